@@ -1,10 +1,19 @@
 const express = require('express');
 const WebSocket = require('ws');
 const path = require('path');
-const QRCode = require('qrcode');
 const cors = require('cors');
 const helmet = require('helmet');
 const http = require('http');
+const cluster = require('cluster');
+const { BroadcastScheduler } = require('./lib/broadcaster');
+const { EventJournal } = require('./lib/journal');
+const { parseNormalizeRules } = require('./lib/person-index');
+const { ParticipantStore, LeaderboardReplica } = require('./lib/store');
+const { createPubSub } = require('./lib/pubsub');
+const { isPrimary, OwnerClient, serveOwner, collectFromWorkers, serveWorker, forkWorkers, stopWorkers } = require('./lib/cluster');
+const { QRCodeCache, matchesETag } = require('./lib/qrcode-cache');
+const { Logger } = require('./lib/logger');
+const metrics = require('./lib/metrics');
 
 // 应用配置
 const PORT = process.env.PORT || 3000;
@@ -45,17 +54,52 @@ app.use((req, res, next) => {
   next();
 });
 
-// 内存数据存储
-const participants = new Map(); // participantId -> participant data
-let nextId = 1;
-let sortedParticipants = [];
-let lastUpdateTime = 0;
-
-// 防重提交缓存
-const submitCache = new Map(); // ip -> last submit time
+// 常量定义
+const MAX_PARTICIPANTS = parseInt(process.env.MAX_PARTICIPANTS, 10) || 2000;
+const MAX_WS_CONNECTIONS = parseInt(process.env.MAX_WS_CONNECTIONS, 10) || 50; // 每个进程的连接上限
+const RATE_LIMIT_MS = 5000; // 5秒防重提交
+const BROADCAST_WINDOW_MS = parseInt(process.env.BROADCAST_WINDOW_MS, 10) || 100; // 广播合并窗口
+const WS_MAX_BUFFERED_BYTES = 1024 * 1024; // 单连接发送积压上限，超过后跳过并待重新同步
+const JOURNAL_ENABLED = process.env.JOURNAL_ENABLED !== 'false'; // 持久化日志，设为false关闭
+const JOURNAL_DIR = process.env.JOURNAL_DIR || path.join(__dirname, 'data');
+const DUPLICATE_NORMALIZE = parseNormalizeRules(process.env.DUPLICATE_NORMALIZE); // 重复人员判定的规范化规则
+const CLUSTER_WORKERS = parseInt(process.env.CLUSTER_WORKERS, 10) || 1; // 大于1时启用多进程模式
+const PUBSUB_BACKEND = process.env.PUBSUB_BACKEND || 'ipc'; // 集群模式下的发布订阅后端
+const LEADERBOARD_TOPIC = 'leaderboard';
+const SUBMIT_URL = `https://${DOMAIN}/submit`; // 二维码指向的提交地址
+const QRCODE_MAX_AGE = 3600; // 二维码浏览器缓存时间（秒），过期后凭ETag校验
+const LOG_LEVEL = process.env.LOG_LEVEL || 'info'; // debug | info | warn | error | silent
+const STATS_INTERVAL_MS = parseInt(process.env.STATS_INTERVAL_MS, 10) || 2000; // 管理后台统计推送间隔
+const METRICS_TIMEOUT_MS = 3000; // 集群模式下等待各工作进程返回监控指标的时间，需短于工作进程的RPC超时
+const MAX_STATS_CONNECTIONS = 10; // 统计频道连接上限，不占用大屏连接数
+
+// 进程角色：single 单进程；owner 集群主进程，持有权威数据；worker 集群工作进程，处理HTTP和WebSocket
+const ROLE = CLUSTER_WORKERS <= 1 ? 'single' : (isPrimary ? 'owner' : 'worker');
+
+// 数据存储：写操作统一由持有权威数据的进程执行，读操作使用本进程的榜单（单进程为存储本身，工作进程为副本）
+const pubsub = createPubSub(ROLE === 'single' ? 'local' : PUBSUB_BACKEND);
+
+const store = ROLE === 'worker' ? null : new ParticipantStore({
+  maxParticipants: MAX_PARTICIPANTS,
+  rateLimitMs: RATE_LIMIT_MS,
+  normalizeRules: DUPLICATE_NORMALIZE,
+  // 持久化日志：写操作在组提交落盘后才响应客户端
+  journal: JOURNAL_ENABLED ? new EventJournal({
+    dir: JOURNAL_DIR,
+    onError: (error) => log(`持久化日志错误: ${error.message}`, 'error')
+  }) : null,
+  publish: (message) => pubsub.publish(LEADERBOARD_TOPIC, message)
+});
+const replica = ROLE === 'worker' ? new LeaderboardReplica() : null;
+const view = store || replica;
+const ownerClient = ROLE === 'worker' ? new OwnerClient() : null;
 
-// WebSocket连接管理
+// WebSocket连接管理：clients 为大屏连接，statsClients 为管理后台统计频道连接
 const clients = new Set();
+const statsClients = new Set();
+
+// 二维码缓存
+const qrCodeCache = new QRCodeCache({ url: SUBMIT_URL });
 
 // 错误消息映射
 const errorMessages = {
@@ -64,23 +108,47 @@ const errorMessages = {
   'DUPLICATE_ENTRY': '您已经提交过了，相同设备可修改数据',
   'SERVER_BUSY': '系统繁忙，请稍后重试',
   'RATE_LIMIT': '提交太频繁，请等待几秒后再试',
-  'MAX_PARTICIPANTS': '参与人数已达上限（500人）',
+  'MAX_PARTICIPANTS': `参与人数已达上限（${MAX_PARTICIPANTS}人）`,
   'INVALID_TARGET': '目标金额必须是大于0的数字，最大999,999.99',
   'DUPLICATE_PERSON': '该人员已存在，将覆盖原有金额',
   'PERSON_EXISTS': '检测到重复人员：{name}（{organization}），当前金额：{currentTarget}万元，是否覆盖为新的金额：{newTarget}万元？'
 };
 
-// 常量定义
-const MAX_PARTICIPANTS = 500;
-const MAX_WS_CONNECTIONS = 50;
-const RATE_LIMIT_MS = 5000; // 5秒防重提交
-
 // 工具函数
+const LOG_TAG = ROLE === 'single' ? '' : ` [${ROLE === 'owner' ? 'primary' : `worker-${cluster.worker.id}`}]`;
+
+// 日志先进入缓冲，由日志模块异步批量写出
+const logger = new Logger({ level: LOG_LEVEL, tag: LOG_TAG });
+
 function log(message, level = 'info') {
-  const timestamp = new Date().toISOString();
-  console.log(`[${timestamp}] [${level.toUpperCase()}] ${message}`);
+  logger.log(message, level);
 }
 
+// 监控指标，/metrics 以Prometheus文本格式输出
+metrics.startRuntimeMetrics();
+
+const submitDuration = new metrics.Histogram({
+  name: 'meeting_submit_duration_seconds',
+  help: '提交接口处理耗时（含等待持久化日志落盘）',
+  labelNames: ['route', 'result']
+});
+
+new metrics.Gauge({
+  name: 'meeting_participants',
+  help: '当前参与人数',
+  collect: () => view.participants.size
+});
+
+new metrics.Gauge({
+  name: 'meeting_ws_connections',
+  help: '当前WebSocket连接数',
+  labelNames: ['channel'],
+  collect: () => [
+    { labels: { channel: 'display' }, value: clients.size },
+    { labels: { channel: 'stats' }, value: statsClients.size }
+  ]
+});
+
 function getClientIP(req) {
   return req.headers['x-forwarded-for']?.split(',')[0] ||
          req.connection.remoteAddress ||
@@ -122,96 +190,176 @@ function validateParticipantData(data) {
     errors.push('姓名不能超过20个字符');
   }
 
-  if (!data.target || isNaN(data.target)) {
-    errors.push('目标金额必须是数字');
-  } else {
-    const target = parseFloat(data.target);
-    if (target <= 0) {
-      errors.push('目标金额必须大于0');
-    } else if (target > 999999.99) {
-      errors.push('目标金额不能超过999,999.99');
-    }
-  }
+  errors.push(...validateTarget(data.target));
 
   return errors;
 }
 
-function checkRateLimit(ip) {
-  const lastSubmit = submitCache.get(ip) || 0;
-  const now = Date.now();
-
-  if (now - lastSubmit < RATE_LIMIT_MS) {
-    return false;
+// 金额会作为榜单索引的排序键，NaN/Infinity 进入索引会破坏排序，提交和覆盖更新都必须校验
+function validateTarget(value) {
+  const target = parseFloat(value);
+  if ((typeof value !== 'string' && typeof value !== 'number') || isNaN(value) || !Number.isFinite(target)) {
+    return ['目标金额必须是数字'];
+  }
+  if (target <= 0) {
+    return ['目标金额必须大于0'];
   }
+  if (target > 999999.99) {
+    return ['目标金额不能超过999,999.99'];
+  }
+  return [];
+}
 
-  submitCache.set(ip, now);
-  return true;
+// 客户端可能以字符串提交ID，统一转换为Map中使用的数字键
+function parseParticipantId(value) {
+  const id = typeof value === 'number' ? value : Number(String(value).trim());
+  return Number.isSafeInteger(id) && id > 0 ? id : null;
 }
 
-function findDuplicatePerson(organization, name) {
-  // 遍历所有参与者，查找相同机构和姓名的人员
-  for (const participant of participants.values()) {
-    if (participant.organization === organization && participant.name === name) {
-      return participant;
-    }
+// 写操作发送给持有权威数据的进程执行
+function dispatch(command) {
+  return store ? store.execute(command) : ownerClient.request(command);
+}
+
+// 集群主进程额外响应工作进程的指标请求：汇总主进程和所有工作进程的指标，
+// 无论抓取落在哪个工作进程上，输出的序列都相同
+function executeOwnerCommand(command) {
+  if (command.type === 'metrics') {
+    return collectClusterMetrics();
   }
-  return null;
+  return store.execute(command);
 }
 
-function sortParticipants() {
-  const now = Date.now();
-  if (now - lastUpdateTime < 1000 && sortedParticipants.length > 0) {
-    return sortedParticipants;
+async function collectClusterMetrics() {
+  const { results, missing } = await collectFromWorkers({ type: 'metrics' }, METRICS_TIMEOUT_MS);
+  if (missing.length > 0) {
+    log(`工作进程 ${missing.join(', ')} 未返回监控指标`, 'warn');
   }
+  return results.reduce(
+    (families, { result }) => families.concat(result),
+    metrics.registry.collect({ process: 'primary' })
+  );
+}
 
-  sortedParticipants = Array.from(participants.values())
-    .sort((a, b) => {
-      if (b.target !== a.target) {
-        return b.target - a.target; // 金额降序
-      }
-      return a.timestamp - b.timestamp; // 时间升序
-    });
+// 集群工作进程响应主进程的指标采集
+function executeWorkerCommand(command) {
+  if (command.type === 'metrics') {
+    return metrics.registry.collect({ process: `worker-${cluster.worker.id}` });
+  }
+  throw new Error(`未知命令: ${command.type}`);
+}
 
-  lastUpdateTime = now;
-  return sortedParticipants;
+// 本进程的统计信息，用于 /api/stats 和管理后台统计频道
+function getLocalStats() {
+  return {
+    total: view.participants.size,
+    version: view.version,
+    maxParticipants: MAX_PARTICIPANTS,
+    wsConnections: clients.size,
+    statsConnections: statsClients.size,
+    memoryUsage: process.memoryUsage(),
+    uptime: process.uptime(),
+    lastUpdate: view.lastUpdateTime,
+    broadcast: broadcaster.getMetrics(),
+    qrcode: qrCodeCache.getMetrics(),
+    cluster: {
+      role: ROLE,
+      workers: CLUSTER_WORKERS,
+      workerId: cluster.isWorker ? cluster.worker.id : null
+    }
+  };
 }
 
-function addParticipant(participant) {
-  participants.set(participant.id, participant);
-  sortParticipants();
-  broadcastUpdate();
+// 向管理后台推送统计，所有连接共享同一个Buffer
+function pushStats() {
+  if (statsClients.size === 0) return;
+
+  const buffer = Buffer.from(JSON.stringify({ type: 'stats', data: getLocalStats(), timestamp: Date.now() }));
+  statsClients.forEach(ws => {
+    if (ws.readyState === WebSocket.OPEN && ws.bufferedAmount < WS_MAX_BUFFERED_BYTES) {
+      ws.send(buffer, { binary: false });
+    }
+  });
 }
 
-function updateParticipant(id, updatedData) {
-  const existing = participants.get(id);
-  if (existing) {
-    participants.set(id, { ...existing, ...updatedData, timestamp: Date.now() });
-    sortParticipants();
-    broadcastUpdate();
-    return true;
+function handleStatsConnection(ws) {
+  if (statsClients.size >= MAX_STATS_CONNECTIONS) {
+    ws.close(1008, '连接数已达上限');
+    return;
   }
-  return false;
+
+  statsClients.add(ws);
+  ws.isAlive = true;
+  ws.on('message', () => {
+    ws.isAlive = true;
+  });
+  ws.on('pong', () => {
+    ws.isAlive = true;
+  });
+  ws.on('close', () => {
+    statsClients.delete(ws);
+  });
+  ws.on('error', (error) => {
+    statsClients.delete(ws);
+    log(`统计频道连接错误: ${error.message}`, 'warn');
+  });
+
+  pushStats();
 }
 
-function broadcastUpdate() {
-  if (clients.size === 0) return;
+// 推送协议：
+// - initial: 全量快照 { seq, reason: connect|resync|reset, data, total }
+// - delta:   增量变更 { seq, ops: [insert|update|move|remove], total }
+// 客户端发现 seq 不连续时发送 { type: 'resync' } 获取新快照
+// 变更由调度器在合并窗口内批量推送，请求处理过程中不做序列化和发送
+const broadcaster = new BroadcastScheduler({
+  clients: clients,
+  windowMs: BROADCAST_WINDOW_MS,
+  maxBufferedBytes: WS_MAX_BUFFERED_BYTES,
+  getTotal: () => view.participants.size,
+  getSnapshot: () => view.leaderboard.toArray(),
+  onError: (error) => log(`发送WebSocket消息失败: ${error.message}`, 'warn')
+});
 
-  const message = JSON.stringify({
-    type: 'update',
-    data: sortParticipants(),
-    total: participants.size,
-    timestamp: Date.now()
-  });
+function sendSnapshot(ws, reason) {
+  broadcaster.sendSnapshot(ws, reason);
+}
 
-  clients.forEach(ws => {
-    if (ws.readyState === WebSocket.OPEN) {
-      try {
-        ws.send(message);
-      } catch (error) {
-        log(`发送WebSocket消息失败: ${error.message}`, 'warn');
-      }
+function handleLeaderboardMessage(message) {
+  if (replica) {
+    const status = replica.receive(message);
+    if (status === 'gap') {
+      refreshReplica();
     }
-  });
+    if (status !== 'applied') return;
+  }
+
+  if (message.type === 'delta') {
+    broadcaster.enqueue(message.ops);
+  } else {
+    broadcaster.reset(message.reason);
+  }
+}
+
+// 工作进程从主进程拉取快照重建副本，完成后通知本进程所有客户端重新同步
+let replicaLoading = null;
+
+function refreshReplica() {
+  if (!replicaLoading) {
+    replicaLoading = dispatch({ type: 'snapshot' })
+      .then(snapshot => {
+        replica.load(snapshot);
+        broadcaster.reset('resync');
+      })
+      .catch(error => {
+        log(`同步榜单副本失败，1秒后重试: ${error.message}`, 'error');
+        setTimeout(refreshReplica, 1000);
+      })
+      .then(() => {
+        replicaLoading = null;
+      });
+  }
+  return replicaLoading;
 }
 
 // WebSocket服务器配置
@@ -222,6 +370,12 @@ const wss = new WebSocket.Server({
 });
 
 wss.on('connection', (ws, req) => {
+  // 管理后台统计频道：/ws?channel=stats，只接收定期推送的统计信息，不接收榜单数据
+  if (req.url.includes('channel=stats')) {
+    handleStatsConnection(ws);
+    return;
+  }
+
   // 连接数限制
   if (clients.size >= MAX_WS_CONNECTIONS) {
     ws.close(1008, '连接数已达上限');
@@ -230,20 +384,32 @@ wss.on('connection', (ws, req) => {
   }
 
   clients.add(ws);
+  ws.isAlive = true;
   const clientIP = getClientIP(req);
   log(`WebSocket客户端连接，IP: ${clientIP}，当前连接数: ${clients.size}`);
 
   // 发送初始数据
-  try {
-    ws.send(JSON.stringify({
-      type: 'initial',
-      data: sortParticipants(),
-      total: participants.size,
-      timestamp: Date.now()
-    }));
-  } catch (error) {
-    log(`发送WebSocket初始数据失败: ${error.message}`, 'warn');
-  }
+  sendSnapshot(ws, 'connect');
+
+  ws.on('message', (raw) => {
+    let message;
+    try {
+      message = JSON.parse(raw);
+    } catch (error) {
+      log(`WebSocket消息解析失败: ${error.message}`, 'warn');
+      return;
+    }
+
+    switch (message.type) {
+      case 'resync':
+      case 'refresh':
+        sendSnapshot(ws, 'resync');
+        break;
+      case 'heartbeat':
+        ws.isAlive = true;
+        break;
+    }
+  });
 
   ws.on('close', (code, reason) => {
     clients.delete(ws);
@@ -260,19 +426,6 @@ wss.on('connection', (ws, req) => {
   });
 });
 
-// WebSocket心跳检测
-setInterval(() => {
-  clients.forEach(ws => {
-    if (!ws.isAlive) {
-      ws.terminate();
-      clients.delete(ws);
-      return;
-    }
-    ws.isAlive = false;
-    ws.ping();
-  });
-}, 30000);
-
 // 路由配置
 
 // 主页 - 大屏展示页面
@@ -292,26 +445,25 @@ app.get('/admin', (req, res) => {
 
 // API路由
 
-// 生成二维码
+// 生成二维码，支持 ?format=svg|png&size=128-1024
 app.get('/api/qrcode', async (req, res) => {
   try {
-    const submitURL = `https://${DOMAIN}/submit`;
-    const qrDataUrl = await QRCode.toDataURL(submitURL, {
-      width: 256,
-      margin: 2,
-      color: {
-        dark: '#000000',
-        light: '#FFFFFF'
-      }
-    });
+    const variant = qrCodeCache.parseVariant(req.query);
+    if (!variant) {
+      return createErrorResponse(res, 'INVALID_FORMAT', ['format仅支持svg或png']);
+    }
+
+    const entry = await qrCodeCache.get(variant);
+    res.setHeader('ETag', entry.etag);
+    res.setHeader('Cache-Control', `public, max-age=${QRCODE_MAX_AGE}`);
+
+    if (matchesETag(req.headers['if-none-match'], entry.etag)) {
+      return res.status(304).end();
+    }
 
-    res.setHeader('Content-Type', 'image/svg+xml');
-    res.end(`<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="300" height="320" viewBox="0 0 300 320">
-  <rect width="300" height="320" fill="white" stroke="black" stroke-width="2"/>
-  <image x="22" y="22" width="256" height="256" xlink:href="${qrDataUrl.replace('data:image/png;base64,', 'data:image/png;base64,')}" transform="scale(1.0)"/>
-  <text x="150" y="295" text-anchor="middle" font-family="Arial, sans-serif" font-size="14" fill="black">扫描填写信息</text>
-</svg>`);
+    res.setHeader('Content-Type', entry.contentType);
+    res.setHeader('Content-Length', entry.buffer.length);
+    res.end(entry.buffer);
   } catch (error) {
     log(`生成二维码失败: ${error.message}`, 'error');
     res.status(500).json({ error: '二维码生成失败' });
@@ -319,29 +471,38 @@ app.get('/api/qrcode', async (req, res) => {
 });
 
 // 提交参与者信息
-app.post('/api/participant', (req, res) => {
+app.post('/api/participant', async (req, res) => {
+  const endTimer = submitDuration.startTimer({ route: 'participant' });
+  let result = { status: 'error' };
+
   try {
     const clientIP = getClientIP(req);
 
-    // 防重提交检查
-    if (!checkRateLimit(clientIP)) {
-      return createErrorResponse(res, 'RATE_LIMIT');
-    }
-
     // 数据验证
     const validationErrors = validateParticipantData(req.body);
     if (validationErrors.length > 0) {
+      result = { status: 'invalid' };
       return createErrorResponse(res, 'INVALID_FORMAT', validationErrors);
     }
 
-    const organization = req.body.organization.trim();
-    const name = req.body.name.trim();
     const target = parseFloat(req.body.target);
+    result = await dispatch({
+      type: 'submit',
+      ip: clientIP,
+      organization: req.body.organization.trim(),
+      name: req.body.name.trim(),
+      target: target
+    });
+
+    // 防重提交检查
+    if (result.status === 'rate_limited') {
+      return createErrorResponse(res, 'RATE_LIMIT');
+    }
 
     // 检查是否存在重复人员（同一机构+同一姓名）
-    const existingPerson = findDuplicatePerson(organization, name);
+    if (result.status === 'duplicate') {
+      const existingPerson = result.participant;
 
-    if (existingPerson) {
       // 检测到重复人员，返回提醒信息
       return createSuccessResponse(res, {
         isDuplicate: true,
@@ -361,20 +522,11 @@ app.post('/api/participant', (req, res) => {
     }
 
     // 参与人数检查（只有新增时才检查）
-    if (participants.size >= MAX_PARTICIPANTS) {
+    if (result.status === 'full') {
       return createErrorResponse(res, 'MAX_PARTICIPANTS');
     }
 
-    const participant = {
-      id: nextId++,
-      organization: organization,
-      name: name,
-      target: target,
-      timestamp: Date.now()
-    };
-
-    addParticipant(participant);
-
+    const participant = result.participant;
     log(`新增参与者: ${participant.name} (${participant.organization}) - 目标: ${participant.target}万元`);
 
     createSuccessResponse(res, {
@@ -384,31 +536,43 @@ app.post('/api/participant', (req, res) => {
   } catch (error) {
     log(`提交参与者失败: ${error.message}`, 'error');
     createErrorResponse(res, 'SERVER_BUSY');
+  } finally {
+    endTimer({ result: result.status });
   }
 });
 
 // 确认覆盖已存在的人员信息
-app.post('/api/participant/confirm', (req, res) => {
+app.post('/api/participant/confirm', async (req, res) => {
+  const endTimer = submitDuration.startTimer({ route: 'confirm' });
+  let result = { status: 'error' };
+
   try {
     const { personId, newTarget } = req.body;
 
     if (!personId || !newTarget) {
+      result = { status: 'invalid' };
       return createErrorResponse(res, 'MISSING_REQUIRED', ['缺少必要参数']);
     }
 
-    const existingPerson = participants.get(personId);
-    if (!existingPerson) {
-      return createErrorResponse(res, 'INVALID_FORMAT', ['人员不存在']);
+    const targetErrors = validateTarget(newTarget);
+    if (targetErrors.length > 0) {
+      result = { status: 'invalid' };
+      return createErrorResponse(res, 'INVALID_TARGET', targetErrors);
     }
 
-    // 更新金额
-    const oldTarget = existingPerson.target;
-    existingPerson.target = parseFloat(newTarget);
-    existingPerson.timestamp = Date.now();
+    const id = parseParticipantId(personId);
+    result = id === null ? { status: 'not_found' } : await dispatch({
+      type: 'confirm',
+      id: id,
+      target: parseFloat(newTarget)
+    });
+    if (result.status === 'not_found') {
+      return createErrorResponse(res, 'INVALID_FORMAT', ['人员不存在']);
+    }
 
-    // 重新排序并广播更新
-    sortParticipants();
-    broadcastUpdate();
+    // 更新金额并调整排名
+    const existingPerson = result.participant;
+    const oldTarget = result.oldTarget;
 
     log(`覆盖更新人员: ${existingPerson.name} (${existingPerson.organization}) - 原金额: ${oldTarget}万元 → 新金额: ${existingPerson.target}万元`);
 
@@ -421,16 +585,19 @@ app.post('/api/participant/confirm', (req, res) => {
   } catch (error) {
     log(`确认覆盖失败: ${error.message}`, 'error');
     createErrorResponse(res, 'SERVER_BUSY');
+  } finally {
+    endTimer({ result: result.status });
   }
 });
 
 // 获取参与者列表
 app.get('/api/participants', (req, res) => {
   try {
-    const participants = sortParticipants();
+    const ranked = view.leaderboard.toArray();
     createSuccessResponse(res, {
-      participants: participants,
-      total: participants.length,
+      participants: ranked,
+      total: ranked.length,
+      version: view.version,
       timestamp: Date.now()
     });
   } catch (error) {
@@ -440,17 +607,13 @@ app.get('/api/participants', (req, res) => {
 });
 
 // 获取统计信息
-app.get('/api/stats', (req, res) => {
+app.get('/api/stats', async (req, res) => {
   try {
-    const stats = {
-      total: participants.size,
-      maxParticipants: MAX_PARTICIPANTS,
-      wsConnections: clients.size,
-      memoryUsage: process.memoryUsage(),
-      uptime: process.uptime(),
-      lastUpdate: lastUpdateTime
-    };
-    createSuccessResponse(res, stats);
+    const ownerStats = await dispatch({ type: 'stats' });
+    createSuccessResponse(res, {
+      ...getLocalStats(),
+      journal: ownerStats.journal
+    });
   } catch (error) {
     log(`获取统计信息失败: ${error.message}`, 'error');
     createErrorResponse(res, 'SERVER_BUSY');
@@ -458,14 +621,9 @@ app.get('/api/stats', (req, res) => {
 });
 
 // 清空所有数据
-app.delete('/api/participants', (req, res) => {
+app.delete('/api/participants', async (req, res) => {
   try {
-    const count = participants.size;
-    participants.clear();
-    sortedParticipants = [];
-    nextId = 1;
-    lastUpdateTime = 0;
-    broadcastUpdate();
+    const { count } = await dispatch({ type: 'clear' });
 
     log(`清空了${count}条参与者数据`);
     createSuccessResponse(res, { clearedCount: count }, '数据已清空');
@@ -475,6 +633,20 @@ app.delete('/api/participants', (req, res) => {
   }
 });
 
+// Prometheus指标；集群模式下由主进程汇总自身和所有工作进程的指标（以 process 标签区分）
+app.get('/metrics', async (req, res) => {
+  try {
+    const families = ROLE === 'worker'
+      ? await dispatch({ type: 'metrics' })
+      : metrics.registry.collect();
+    res.setHeader('Content-Type', metrics.CONTENT_TYPE);
+    res.end(metrics.render(families));
+  } catch (error) {
+    log(`采集监控指标失败: ${error.message}`, 'error');
+    res.status(500).end();
+  }
+});
+
 // 错误处理中间件
 app.use((err, req, res, next) => {
   log(`服务器错误: ${err.message}`, 'error');
@@ -494,17 +666,6 @@ app.use((req, res) => {
   });
 });
 
-// 系统监控和清理
-setInterval(() => {
-  // 清理过期的防重提交缓存
-  const now = Date.now();
-  for (const [ip, timestamp] of submitCache.entries()) {
-    if (now - timestamp > 60000) { // 1分钟后清理
-      submitCache.delete(ip);
-    }
-  }
-}, 300000); // 每5分钟清理一次
-
 // 内存监控
 setInterval(() => {
   const memUsage = process.memoryUsage();
@@ -512,49 +673,158 @@ setInterval(() => {
   const memTotalMB = Math.round(memUsage.heapTotal / 1024 / 1024);
 
   if (memUsedMB > 500) { // 内存使用超过500MB时警告
-    log(`内存使用过高: ${memUsedMB}MB/${memTotalMB}MB，参与者数: ${participants.size}，WebSocket连接数: ${clients.size}`, 'warn');
+    log(`内存使用过高: ${memUsedMB}MB/${memTotalMB}MB，参与者数: ${view.participants.size}，WebSocket连接数: ${clients.size}`, 'warn');
 
-    // 如果内存使用接近1GB，触发紧急清理
-    if (memUsedMB > 1024) {
+    // 如果内存使用接近1GB，触发紧急清理（只有持有权威数据的进程执行）
+    if (memUsedMB > 1024 && store) {
       log('内存使用过高，触发紧急数据清理', 'error');
-      participants.clear();
-      sortedParticipants = [];
-      broadcastUpdate();
+      store.releaseMemory()
+        .then(count => log(`紧急清理了${count}条参与者数据`, 'warn'))
+        .catch(error => log(`紧急数据清理失败: ${error.message}`, 'error'));
     }
   }
 }, 60000); // 每分钟检查一次
 
-// 服务器启动
-server.listen(PORT, '0.0.0.0', () => {
-  log(`互动目标展示系统启动成功`);
+// 从快照和日志恢复数据；失败时返回 false，由调用方退出
+// 此时仍在加载 app.js，异常若直接抛出会绕过日志，只留下一段堆栈
+function loadStore() {
+  try {
+    store.load();
+  } catch (error) {
+    log(`加载持久化日志失败（${JOURNAL_DIR}）: ${error.message}`, 'error');
+    log('请确认该目录存在且运行服务的用户可写，或设置 JOURNAL_ENABLED=false 关闭持久化', 'error');
+    return false;
+  }
+
+  if (JOURNAL_ENABLED) {
+    log(`已从持久化日志恢复${store.participants.size}条参与者数据（${JOURNAL_DIR}）`);
+  }
+
+  setInterval(() => {
+    // 清理过期的防重提交缓存
+    store.pruneRateLimit(60000); // 1分钟后清理
+  }, 300000); // 每5分钟清理一次
+  return true;
+}
+
+// 启动HTTP和WebSocket服务（单进程或工作进程）
+function startServer() {
+  pubsub.subscribe(LEADERBOARD_TOPIC, handleLeaderboardMessage);
+  if (ROLE === 'worker') {
+    serveWorker(executeWorkerCommand, log);
+  }
+
+  // 预渲染默认二维码
+  qrCodeCache.warm().catch(error => {
+    log(`预渲染二维码失败: ${error.message}`, 'error');
+  });
+
+  // WebSocket心跳检测
+  setInterval(() => {
+    [clients, statsClients].forEach(connections => {
+      connections.forEach(ws => {
+        if (!ws.isAlive) {
+          ws.terminate();
+          connections.delete(ws);
+          return;
+        }
+        ws.isAlive = false;
+        ws.ping();
+      });
+    });
+  }, 30000);
+
+  // 管理后台统计推送
+  setInterval(pushStats, STATS_INTERVAL_MS);
+
+  const ready = replica ? refreshReplica() : Promise.resolve();
+  ready.then(() => {
+    server.listen(PORT, '0.0.0.0', () => {
+      if (ROLE === 'worker') {
+        log(`工作进程已启动，端口: ${PORT}`);
+        return;
+      }
+      log(`互动目标展示系统启动成功`);
+      log(`服务器地址: http://${DOMAIN}:${PORT}`);
+      log(`环境: ${NODE_ENV}`);
+      log(`大屏展示: http://${DOMAIN}:${PORT}/`);
+      log(`数据收集: http://${DOMAIN}:${PORT}/submit`);
+      log(`管理页面: http://${DOMAIN}:${PORT}/admin`);
+      log(`WebSocket: ws://${DOMAIN}:${PORT}/ws`);
+    });
+  });
+}
+
+// 集群主进程：持有权威数据，启动工作进程并执行它们转发的写操作
+function startOwner() {
+  serveOwner(executeOwnerCommand, log);
+  forkWorkers(CLUSTER_WORKERS, log);
+  log(`互动目标展示系统以集群模式启动，工作进程数: ${CLUSTER_WORKERS}，发布订阅后端: ${PUBSUB_BACKEND}`);
   log(`服务器地址: http://${DOMAIN}:${PORT}`);
   log(`环境: ${NODE_ENV}`);
-  log(`大屏展示: http://${DOMAIN}:${PORT}/`);
-  log(`数据收集: http://${DOMAIN}:${PORT}/submit`);
-  log(`管理页面: http://${DOMAIN}:${PORT}/admin`);
-  log(`WebSocket: ws://${DOMAIN}:${PORT}/ws`);
-});
+}
+
+if (store && !loadStore()) {
+  exitAfterLogs(1);
+} else if (ROLE === 'owner') {
+  startOwner();
+} else {
+  startServer();
+}
 
 // 优雅关闭
-process.on('SIGTERM', () => {
-  log('收到SIGTERM信号，开始优雅关闭...');
+function closeStore() {
+  if (!store) {
+    return Promise.resolve();
+  }
+  return store.close().catch(error => {
+    log(`关闭持久化日志失败: ${error.message}`, 'error');
+  });
+}
+
+// 等待缓冲中的日志写出后退出
+function exitAfterLogs(code) {
+  logger.close().then(() => process.exit(code));
+}
+
+function shutdown(signal) {
+  log(`收到${signal}信号，开始优雅关闭...`);
+
+  if (ROLE === 'owner') {
+    stopWorkers(() => {
+      closeStore().then(() => {
+        log('服务器已关闭');
+        exitAfterLogs(0);
+      });
+    });
+    return;
+  }
+
+  broadcaster.stop();
   server.close(() => {
     wss.close(() => {
-      log('服务器已关闭');
-      process.exit(0);
+      closeStore().then(() => {
+        log('服务器已关闭');
+        exitAfterLogs(0);
+      });
     });
   });
-});
+}
 
-process.on('SIGINT', () => {
-  log('收到SIGINT信号，开始优雅关闭...');
-  server.close(() => {
-    wss.close(() => {
-      log('服务器已关闭');
-      process.exit(0);
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
+
+// 主进程关闭时断开IPC通道，此时监听已由 cluster 关闭；
+// 心跳等定时器会让工作进程一直存活，而主进程要等工作进程退出才能完成关闭
+if (ROLE === 'worker') {
+  process.on('disconnect', () => {
+    broadcaster.stop();
+    [clients, statsClients].forEach(connections => {
+      connections.forEach(ws => ws.terminate());
     });
+    exitAfterLogs(0);
   });
-});
+}
 
 // 未捕获异常处理
 process.on('uncaughtException', (error) => {
@@ -566,4 +836,7 @@ process.on('unhandledRejection', (reason, promise) => {
   log(`未处理的Promise拒绝: ${reason}`, 'error');
 });
 
+// 供进程内基准测试获取监听端口（PORT=0 时随机分配）
+app.server = server;
+
 module.exports = app;
\ No newline at end of file
@@ -0,0 +1,374 @@
+// 大屏榜单渲染回放基准测试（无浏览器）
+// 回放一段录制的WebSocket消息流（initial + delta），按60fps虚拟时钟逐帧驱动渲染器，
+// 统计每帧脚本耗时（消息解析 + 应用增量 + requestAnimationFrame 回调）和DOM写入次数。
+// 对比两种渲染方式：
+// - keyed-virtual: public/scripts/leaderboard-renderer.js（按ID复用行、只挂载可视行）
+// - full-rebuild:  每条消息重建整张表（原先 innerHTML 方式的等价DOM操作）
+// 使用最小化的模拟DOM，不包含浏览器的样式计算、布局和绘制时间，结果用于比较脚本和DOM操作的开销，
+// 实际帧预算需为布局和绘制留出余量
+// 用法: node bench/display.js [--rows=1200] [--rate=30] [--duration=30] [--scroll=4]
+//                             [--save=stream.jsonl] [--replay=stream.jsonl]
+
+const fs = require('fs');
+const { performance } = require('perf_hooks');
+const { ParticipantStore } = require('../lib/store');
+const { LeaderboardRenderer } = require('../public/scripts/leaderboard-renderer');
+const { createRandom, parseArgs, percentile } = require('../test/helpers');
+
+const FRAME_MS = 1000 / 60;
+const BROADCAST_WINDOW_MS = 100;
+const VIEWPORT_HEIGHT = 500;
+const ROW_HEIGHT = 56;
+
+const args = parseArgs(process.argv.slice(2));
+const ROWS = parseInt(args.rows, 10) || 1200;
+const RATE = parseInt(args.rate, 10) || 30; // 每秒榜单变更次数
+const DURATION = parseInt(args.duration, 10) || 30; // 秒
+const SCROLL_SPEED = args.scroll !== undefined ? parseFloat(args.scroll) : 4; // 每帧滚动像素，模拟自动滚屏
+
+// 用真实的 ParticipantStore 生成消息流，并按广播窗口合并成与服务端一致的 delta 消息
+async function recordStream() {
+  const random = createRandom(20241122);
+  const published = [];
+  const store = new ParticipantStore({
+    maxParticipants: Infinity,
+    rateLimitMs: 0,
+    publish: message => published.push(message)
+  });
+  const ids = [];
+  let serial = 0;
+
+  async function submit() {
+    serial++;
+    const result = await store.submit({
+      ip: `10.0.${(serial >> 8) & 255}.${serial & 255}`,
+      organization: `机构${serial % 60}`,
+      name: `参与者${serial}`,
+      target: Math.round(random() * 1000000) / 100
+    });
+    ids.push(result.participant.id);
+  }
+
+  for (let i = 0; i < ROWS; i++) {
+    await submit();
+  }
+
+  const snapshot = store.snapshot();
+  const stream = [{
+    at: 0,
+    message: { type: 'initial', reason: 'connect', seq: 0, data: snapshot.data, total: snapshot.total, timestamp: Date.now() }
+  }];
+  published.length = 0;
+
+  let seq = 0;
+  let pendingOps = [];
+  function flush(at) {
+    if (pendingOps.length === 0) return;
+    seq++;
+    stream.push({
+      at: at,
+      message: { type: 'delta', seq: seq, ops: pendingOps, total: store.participants.size, timestamp: Date.now() }
+    });
+    pendingOps = [];
+  }
+
+  let windowEnd = BROADCAST_WINDOW_MS;
+  for (let at = 1000 / RATE; at < DURATION * 1000; at += 1000 / RATE) {
+    while (at >= windowEnd) {
+      flush(windowEnd);
+      windowEnd += BROADCAST_WINDOW_MS;
+    }
+
+    const roll = random();
+    if (roll < 0.7 && ids.length > 0) {
+      // 修改目标金额：在当前金额附近随机涨跌，产生名次移动
+      const id = ids[Math.floor(random() * ids.length)];
+      const participant = store.participants.get(id);
+      const target = Math.max(1, Math.round(participant.target * (0.8 + random() * 0.5) * 100) / 100);
+      await store.confirm({ id: id, target: target });
+    } else if (roll < 0.9 || ids.length === 0) {
+      await submit();
+    } else {
+      const [id] = ids.splice(Math.floor(random() * ids.length), 1);
+      await store.remove({ id: id });
+    }
+
+    published.forEach(message => pendingOps.push(...message.ops));
+    published.length = 0;
+  }
+  flush(windowEnd);
+
+  return stream;
+}
+
+// ---- 最小化模拟DOM：只实现渲染器用到的接口，并统计DOM写入次数 ----
+
+let domWrites = 0;
+
+class FakeElement {
+  constructor(tagName) {
+    this.tagName = tagName.toUpperCase();
+    this.childNodes = [];
+    this.parentNode = null;
+    this.style = {};
+    this.dataset = {};
+    this.className = '';
+    this.colSpan = 1;
+    this.text = '';
+  }
+
+  get nextSibling() {
+    if (!this.parentNode) return null;
+    const siblings = this.parentNode.childNodes;
+    return siblings[siblings.indexOf(this) + 1] || null;
+  }
+
+  set textContent(value) {
+    this.childNodes.forEach(child => {
+      child.parentNode = null;
+    });
+    this.childNodes = [];
+    this.text = String(value);
+    domWrites++;
+  }
+
+  get textContent() {
+    return this.text + this.childNodes.map(child => child.textContent).join('');
+  }
+
+  appendChild(child) {
+    return this.insertBefore(child, null);
+  }
+
+  insertBefore(child, reference) {
+    if (child.parentNode) {
+      child.parentNode.removeChild(child);
+    }
+    const index = reference ? this.childNodes.indexOf(reference) : this.childNodes.length;
+    this.childNodes.splice(index, 0, child);
+    child.parentNode = this;
+    domWrites++;
+    return child;
+  }
+
+  removeChild(child) {
+    this.childNodes.splice(this.childNodes.indexOf(child), 1);
+    child.parentNode = null;
+    domWrites++;
+    return child;
+  }
+
+  addEventListener() {}
+}
+
+const fakeDocument = {
+  createElement: tagName => new FakeElement(tagName)
+};
+
+function createContainer() {
+  return {
+    clientHeight: VIEWPORT_HEIGHT,
+    scrollTop: 0,
+    listeners: [],
+    addEventListener(type, listener) {
+      if (type === 'scroll') this.listeners.push(listener);
+    },
+    scrollTo({ top }) {
+      this.scrollTop = top;
+    },
+    scroll(top) {
+      this.scrollTop = top;
+      this.listeners.forEach(listener => listener());
+    }
+  };
+}
+
+// ---- 与 display.js 一致的列格式 ----
+
+const RANK_BADGES = ['👑', '🥈', '🥉'];
+
+const TARGET_FORMAT = new Intl.NumberFormat('zh-CN', {
+  minimumFractionDigits: 2,
+  maximumFractionDigits: 2
+});
+const TIME_FORMAT = new Intl.DateTimeFormat('zh-CN', {
+  hour: '2-digit',
+  minute: '2-digit',
+  second: '2-digit'
+});
+
+function formatTarget(target) {
+  return `¥${TARGET_FORMAT.format(Number(target))}`;
+}
+
+function formatTime(timestamp) {
+  return TIME_FORMAT.format(new Date(timestamp));
+}
+
+const COLUMNS = [
+  { render: (participant, rank) => RANK_BADGES[rank] || String(rank + 1) },
+  { render: participant => participant.name },
+  { render: participant => participant.organization },
+  { render: participant => formatTarget(participant.target), strong: true },
+  { render: participant => formatTime(participant.timestamp) }
+];
+
+// 原先的渲染方式：每次更新重建所有行
+class FullRebuildRenderer {
+  constructor(options) {
+    this.tbody = options.tbody;
+    this.requestFrame = options.requestAnimationFrame;
+    this.list = [];
+    this.framePending = false;
+  }
+
+  update(list) {
+    this.list = list;
+    if (this.framePending) return;
+    this.framePending = true;
+    this.requestFrame(() => this.render());
+  }
+
+  render() {
+    this.framePending = false;
+    this.tbody.textContent = '';
+    this.list.forEach((participant, rank) => {
+      const row = fakeDocument.createElement('tr');
+      row.className = rank < 3 ? 'highlight' : '';
+      row.dataset.id = participant.id;
+      COLUMNS.forEach(column => {
+        const td = fakeDocument.createElement('td');
+        td.textContent = column.render(participant, rank);
+        row.appendChild(td);
+      });
+      this.tbody.appendChild(row);
+    });
+  }
+
+  getMetrics() {
+    return {};
+  }
+}
+
+// 与 display.js 中 applyDelta 相同的增量应用逻辑
+function applyDelta(list, op) {
+  switch (op.op) {
+    case 'insert':
+      list.splice(op.rank, 0, op.participant);
+      break;
+    case 'update':
+      list[op.rank] = op.participant;
+      break;
+    case 'move':
+      list.splice(op.from, 1);
+      list.splice(op.to, 0, op.participant);
+      break;
+    case 'remove':
+      list.splice(op.rank, 1);
+      break;
+  }
+}
+
+function replay(label, stream, createRenderer) {
+  const frameCallbacks = [];
+  const container = createContainer();
+  const tbody = new FakeElement('tbody');
+  const renderer = createRenderer({
+    document: fakeDocument,
+    container: container,
+    tbody: tbody,
+    columns: COLUMNS,
+    rowHeight: ROW_HEIGHT,
+    requestAnimationFrame: callback => frameCallbacks.push(callback)
+  });
+
+  // 消息以原始字符串形式投递，解析时间计入帧耗时
+  const messages = stream.map(entry => ({ at: entry.at, raw: JSON.stringify(entry.message) }));
+  const endAt = messages[messages.length - 1].at + FRAME_MS * 30;
+  let participants = [];
+  let next = 0;
+  let writesBefore = domWrites;
+  const busyFrames = [];
+  const writesPerFrame = [];
+
+  for (let now = 0; now <= endAt; now += FRAME_MS) {
+    const started = performance.now();
+
+    while (next < messages.length && messages[next].at <= now) {
+      const data = JSON.parse(messages[next++].raw);
+      if (data.type === 'initial') {
+        participants = data.data;
+        renderer.update(participants, { animate: false });
+      } else {
+        data.ops.forEach(op => applyDelta(participants, op));
+        const inserted = data.ops.filter(op => op.op === 'insert').map(op => op.participant.id);
+        renderer.update(participants, { inserted: inserted });
+      }
+    }
+
+    if (SCROLL_SPEED > 0) {
+      const maxScroll = Math.max(0, participants.length * ROW_HEIGHT - VIEWPORT_HEIGHT);
+      container.scroll(maxScroll > 0 ? (container.scrollTop + SCROLL_SPEED) % maxScroll : 0);
+    }
+
+    const callbacks = frameCallbacks.splice(0);
+    callbacks.forEach(callback => callback(now));
+
+    const elapsed = performance.now() - started;
+    if (callbacks.length > 0) {
+      busyFrames.push(elapsed);
+      writesPerFrame.push(domWrites - writesBefore);
+    }
+    writesBefore = domWrites;
+  }
+
+  busyFrames.sort((a, b) => a - b);
+  const total = writesPerFrame.reduce((sum, count) => sum + count, 0);
+  const metrics = renderer.getMetrics();
+  return {
+    label: label,
+    frames: busyFrames.length,
+    p50Ms: +percentile(busyFrames, 0.5).toFixed(3),
+    p95Ms: +percentile(busyFrames, 0.95).toFixed(3),
+    p99Ms: +percentile(busyFrames, 0.99).toFixed(3),
+    maxMs: +(busyFrames[busyFrames.length - 1] || 0).toFixed(3),
+    overBudget: busyFrames.filter(ms => ms > FRAME_MS).length,
+    domWritesPerFrame: +(total / Math.max(1, writesPerFrame.length)).toFixed(1),
+    mountedRows: metrics.mountedRows !== undefined ? metrics.mountedRows : participants.length,
+    animatedMoves: metrics.animatedMoves || 0
+  };
+}
+
+function loadStream(file) {
+  return fs.readFileSync(file, 'utf8')
+    .split('\n')
+    .filter(line => line.trim())
+    .map(line => JSON.parse(line));
+}
+
+async function main() {
+  const stream = args.replay ? loadStream(args.replay) : await recordStream();
+  if (args.save) {
+    fs.writeFileSync(args.save, stream.map(entry => JSON.stringify(entry)).join('\n') + '\n');
+    console.log(`已保存消息流: ${args.save}（${stream.length} 条）`);
+  }
+
+  const initial = stream[0].message;
+  const deltas = stream.length - 1;
+  const ops = stream.slice(1).reduce((sum, entry) => sum + entry.message.ops.length, 0);
+  console.log(`消息流: 初始 ${initial.total} 行，${deltas} 条增量消息，${ops} 个变更，时长 ${(stream[stream.length - 1].at / 1000).toFixed(1)}s，自动滚屏 ${SCROLL_SPEED}px/帧`);
+
+  const results = [
+    replay('keyed-virtual', stream, options => new LeaderboardRenderer(options)),
+    replay('full-rebuild', stream, options => new FullRebuildRenderer(options))
+  ];
+  console.table(results);
+
+  const keyed = results[0];
+  console.log(`按ID修补 + 虚拟滚动: p99 帧脚本耗时 ${keyed.p99Ms}ms（预算 ${FRAME_MS.toFixed(1)}ms，不含布局和绘制），超预算 ${keyed.overBudget} 帧`);
+}
+
+main().catch(error => {
+  console.error('基准测试失败:', error);
+  process.exit(1);
+});
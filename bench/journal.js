@@ -0,0 +1,86 @@
+// 持久化日志开/关时的提交吞吐对比
+// 模拟提交处理中的热路径：等待日志组提交 + 写入排行榜索引，统计吞吐与延迟分位数
+// 用法: node bench/journal.js [提交总数] [并发数]
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { performance } = require('perf_hooks');
+const { LeaderboardIndex } = require('../lib/leaderboard');
+const { EventJournal } = require('../lib/journal');
+const { percentile } = require('../test/helpers');
+
+const TOTAL = parseInt(process.argv[2], 10) || 5000;
+const CONCURRENCY = parseInt(process.argv[3], 10) || 200;
+
+async function run(label, journal) {
+  const leaderboard = new LeaderboardIndex();
+  const latencies = [];
+  let nextId = 1;
+
+  async function submit() {
+    const started = performance.now();
+    const participant = {
+      id: nextId++,
+      organization: `机构${nextId % 50}`,
+      name: `参与者${nextId}`,
+      target: Math.round(Math.random() * 100000) / 100,
+      timestamp: Date.now()
+    };
+    if (journal) {
+      await journal.append({ type: 'create', participant: participant });
+    }
+    leaderboard.insert(participant);
+    latencies.push(performance.now() - started);
+  }
+
+  const started = performance.now();
+  let issued = 0;
+  async function worker() {
+    while (issued < TOTAL) {
+      issued++;
+      await submit();
+    }
+  }
+  await Promise.all(Array.from({ length: CONCURRENCY }, worker));
+  const elapsed = performance.now() - started;
+
+  latencies.sort((a, b) => a - b);
+  const result = {
+    label: label,
+    total: TOTAL,
+    concurrency: CONCURRENCY,
+    elapsedMs: +elapsed.toFixed(1),
+    throughput: Math.round(TOTAL / (elapsed / 1000)),
+    p50Ms: +percentile(latencies, 0.5).toFixed(3),
+    p95Ms: +percentile(latencies, 0.95).toFixed(3),
+    p99Ms: +percentile(latencies, 0.99).toFixed(3)
+  };
+  if (journal) {
+    const metrics = journal.getMetrics();
+    result.commits = metrics.commits;
+    result.avgBatchSize = +metrics.avgBatchSize.toFixed(1);
+    result.avgCommitMs = +metrics.avgCommitMs.toFixed(3);
+    result.snapshots = metrics.snapshots;
+  }
+  return result;
+}
+
+async function main() {
+  const off = await run('journal-off', null);
+
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'meeting-journal-'));
+  const journal = new EventJournal({ dir: dir });
+  journal.load();
+  const on = await run('journal-on', journal);
+  await journal.close();
+  fs.rmSync(dir, { recursive: true, force: true });
+
+  console.table([off, on]);
+  console.log(`日志开启后吞吐变化: ${(((on.throughput - off.throughput) / off.throughput) * 100).toFixed(1)}%，p99延迟增加: ${(on.p99Ms - off.p99Ms).toFixed(3)}ms`);
+}
+
+main().catch(error => {
+  console.error('基准测试失败:', error);
+  process.exit(1);
+});
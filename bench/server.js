@@ -0,0 +1,371 @@
+// 服务端热路径压测：在本进程内以随机端口启动 app.js，模拟大量不同IP的提交突发和大量大屏连接
+// 阶段：新增提交 -> 重复人员提交 -> 确认覆盖，期间所有WebSocket连接接收增量推送
+// 统计：
+// - 各阶段请求延迟 p50/p95/p99/max 与吞吐
+// - 写入到送达延迟：请求发出到每个连接收到对应增量（含广播合并窗口）
+// - 广播到接收延迟：服务端刷新广播（消息 timestamp）到连接收到
+// - 事件循环延迟（monitorEventLoopDelay）与堆内存增长
+// 客户端与服务端共用一个事件循环和堆，延迟和内存数据用于版本间对比，而非绝对容量评估
+// 结果以JSON输出到标准输出（--out 同时写入文件），可用 --baseline 与上一次结果对比
+// 用法: node --expose-gc bench/server.js [--submits=2000] [--concurrency=100] [--sockets=50]
+//                                        [--confirms=500] [--no-journal] [--out=result.json] [--baseline=old.json]
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const http = require('http');
+const WebSocket = require('ws');
+const { performance, monitorEventLoopDelay } = require('perf_hooks');
+const { parseArgs, percentile } = require('../test/helpers');
+
+const args = parseArgs(process.argv.slice(2));
+const SUBMITS = parseInt(args.submits, 10) || 2000;
+const CONCURRENCY = parseInt(args.concurrency, 10) || 100;
+const SOCKETS = parseInt(args.sockets, 10) || 50;
+const CONFIRMS = Math.min(SUBMITS, parseInt(args.confirms, 10) || 500);
+const JOURNAL = !args['no-journal'];
+const SETTLE_TIMEOUT_MS = 10000;
+
+const journalDir = fs.mkdtempSync(path.join(os.tmpdir(), 'meeting-bench-'));
+
+// 必须在加载 app.js 之前设置
+Object.assign(process.env, {
+  PORT: '0',
+  CLUSTER_WORKERS: '1',
+  MAX_PARTICIPANTS: String(SUBMITS + 100),
+  MAX_WS_CONNECTIONS: String(SOCKETS + 10),
+  JOURNAL_ENABLED: JOURNAL ? 'true' : 'false',
+  JOURNAL_DIR: journalDir,
+  // 标准输出只保留JSON结果
+  LOG_LEVEL: process.env.LOG_LEVEL || 'silent'
+});
+
+function summarize(samples) {
+  const sorted = samples.slice().sort((a, b) => a - b);
+  const round = value => +value.toFixed(3);
+  return {
+    samples: sorted.length,
+    p50Ms: round(percentile(sorted, 0.5)),
+    p95Ms: round(percentile(sorted, 0.95)),
+    p99Ms: round(percentile(sorted, 0.99)),
+    maxMs: round(sorted[sorted.length - 1] || 0)
+  };
+}
+
+function heapUsedMB() {
+  if (global.gc) {
+    global.gc();
+  }
+  return +(process.memoryUsage().heapUsed / 1024 / 1024).toFixed(1);
+}
+
+function waitForListening(server) {
+  return server.listening ? Promise.resolve() : new Promise(resolve => server.once('listening', resolve));
+}
+
+const agent = new http.Agent({ keepAlive: true, maxSockets: CONCURRENCY });
+let port = 0;
+
+function request(method, urlPath, body, headers = {}) {
+  const payload = body ? JSON.stringify(body) : null;
+  return new Promise((resolve, reject) => {
+    const req = http.request({
+      host: '127.0.0.1',
+      port: port,
+      path: urlPath,
+      method: method,
+      agent: agent,
+      headers: payload ? {
+        ...headers,
+        'Content-Type': 'application/json',
+        'Content-Length': Buffer.byteLength(payload)
+      } : headers
+    }, (res) => {
+      let data = '';
+      res.setEncoding('utf8');
+      res.on('data', chunk => {
+        data += chunk;
+      });
+      res.on('end', () => {
+        try {
+          resolve({ status: res.statusCode, body: JSON.parse(data) });
+        } catch (error) {
+          reject(error);
+        }
+      });
+    });
+    req.on('error', reject);
+    if (payload) req.write(payload);
+    req.end();
+  });
+}
+
+function clientIP(index) {
+  return `10.${(index >> 16) & 255}.${(index >> 8) & 255}.${index & 255}`;
+}
+
+// 以固定并发执行 count 个请求，返回延迟和结果统计
+async function runPhase(name, count, send) {
+  const latencies = [];
+  const outcomes = {};
+  let issued = 0;
+
+  async function worker() {
+    while (issued < count) {
+      const index = issued++;
+      const started = performance.now();
+      let outcome;
+      try {
+        outcome = await send(index, started);
+      } catch (error) {
+        outcome = 'error';
+      }
+      latencies.push(performance.now() - started);
+      outcomes[outcome] = (outcomes[outcome] || 0) + 1;
+    }
+  }
+
+  const started = performance.now();
+  await Promise.all(Array.from({ length: Math.min(CONCURRENCY, count) }, worker));
+  const elapsed = performance.now() - started;
+
+  return {
+    phase: name,
+    requests: count,
+    throughput: Math.round(count / (elapsed / 1000)),
+    outcomes: outcomes,
+    ...summarize(latencies)
+  };
+}
+
+// 模拟大屏：记录每个写入被推送到本连接的时间
+class DisplaySocket {
+  constructor(writes, deliveries, broadcasts) {
+    this.writes = writes; // 写入标识 -> 请求发出时间
+    this.deliveries = deliveries;
+    this.broadcasts = broadcasts;
+    this.received = new Set();
+    this.resyncs = 0;
+    this.seq = 0;
+  }
+
+  connect() {
+    return new Promise((resolve, reject) => {
+      this.ws = new WebSocket(`ws://127.0.0.1:${port}/ws`);
+      this.ws.on('message', raw => this.handle(raw));
+      this.ws.once('message', () => resolve());
+      this.ws.once('error', reject);
+    });
+  }
+
+  handle(raw) {
+    const now = performance.now();
+    const message = JSON.parse(raw);
+
+    if (message.type === 'initial') {
+      if (message.reason !== 'connect') this.resyncs++;
+      this.seq = message.seq;
+      return;
+    }
+    if (message.type !== 'delta') return;
+
+    if (message.seq !== this.seq + 1) {
+      this.resyncs++;
+      this.ws.send(JSON.stringify({ type: 'resync', seq: this.seq }));
+    }
+    this.seq = message.seq;
+    this.broadcasts.push(Math.max(0, Date.now() - message.timestamp));
+
+    message.ops.forEach(op => {
+      const key = op.op === 'insert' ? `submit:${op.participant.name}` : `confirm:${op.participant?.id}:${op.participant?.target}`;
+      const started = this.writes.get(key);
+      if (started !== undefined && !this.received.has(key)) {
+        this.received.add(key);
+        this.deliveries.push(now - started);
+      }
+    });
+  }
+
+  close() {
+    this.ws.terminate();
+  }
+}
+
+function waitForDeliveries(sockets, expected) {
+  const deadline = Date.now() + SETTLE_TIMEOUT_MS;
+  return new Promise(resolve => {
+    const check = () => {
+      const done = sockets.every(socket => socket.received.size >= expected);
+      if (done || Date.now() > deadline) {
+        resolve(done);
+      } else {
+        setTimeout(check, 20);
+      }
+    };
+    check();
+  });
+}
+
+function compare(baseline, result) {
+  const rows = [];
+  const add = (label, before, after) => {
+    if (!before || !after) return;
+    ['p50Ms', 'p95Ms', 'p99Ms'].forEach(key => {
+      if (before[key] === undefined) return;
+      const change = before[key] === 0 ? 0 : ((after[key] - before[key]) / before[key]) * 100;
+      rows.push({ metric: `${label}.${key}`, baseline: before[key], current: after[key], change: `${change.toFixed(1)}%` });
+    });
+  };
+  result.phases.forEach(phase => {
+    add(phase.phase, baseline.phases.find(item => item.phase === phase.phase), phase);
+  });
+  add('delivery', baseline.delivery, result.delivery);
+  add('broadcast', baseline.broadcast, result.broadcast);
+  add('eventLoop', baseline.eventLoop, result.eventLoop);
+  return rows;
+}
+
+async function main() {
+  const app = require('../app');
+  await waitForListening(app.server);
+  port = app.server.address().port;
+
+  const writes = new Map();
+  const deliveries = [];
+  const broadcasts = [];
+  const sockets = Array.from({ length: SOCKETS }, () => new DisplaySocket(writes, deliveries, broadcasts));
+  await Promise.all(sockets.map(socket => socket.connect()));
+  // 预热：提前建立全部 keep-alive 连接，避免把TCP建连计入提交延迟
+  await Promise.all(Array.from({ length: CONCURRENCY }, () => request('GET', '/api/participants')));
+
+  const heapBefore = heapUsedMB();
+  const loopDelay = monitorEventLoopDelay({ resolution: 10 });
+  loopDelay.enable();
+  const started = performance.now();
+
+  const created = [];
+  const phases = [];
+
+  // 新增提交：每个请求使用不同IP和不同人员
+  phases.push(await runPhase('submit', SUBMITS, async (index, requestStarted) => {
+    // 推送可能早于响应到达，发出请求前登记，失败时撤销
+    const name = `压测${index}`;
+    const key = `submit:${name}`;
+    writes.set(key, requestStarted);
+    const { body } = await request('POST', '/api/participant', {
+      organization: `机构${index % 50}`,
+      name: name,
+      target: (1 + (index * 7919) % 99999) / 10
+    }, { 'X-Forwarded-For': clientIP(index) }).catch(error => {
+      writes.delete(key);
+      throw error;
+    });
+    if (body.data?.participant) {
+      created.push(body.data.participant);
+      return 'created';
+    }
+    writes.delete(key);
+    return body.errorType || 'failed';
+  }));
+
+  // 重复人员提交：换一个IP再次提交已存在的人员，应返回重复提示
+  phases.push(await runPhase('duplicate', CONFIRMS, async (index) => {
+    const participant = created[index % created.length];
+    const { body } = await request('POST', '/api/participant', {
+      organization: participant.organization,
+      name: participant.name,
+      target: participant.target + 1
+    }, { 'X-Forwarded-For': clientIP(SUBMITS + index) });
+    return body.data?.isDuplicate ? 'duplicate' : (body.errorType || 'failed');
+  }));
+
+  // 确认覆盖：修改金额，产生名次移动
+  phases.push(await runPhase('confirm', CONFIRMS, async (index, requestStarted) => {
+    const participant = created[index % created.length];
+    const newTarget = +(participant.target + 1 + index / 100).toFixed(2);
+    const key = `confirm:${participant.id}:${newTarget}`;
+    writes.set(key, requestStarted);
+    const { body } = await request('POST', '/api/participant/confirm', {
+      personId: participant.id,
+      newTarget: newTarget
+    }).catch(error => {
+      writes.delete(key);
+      throw error;
+    });
+    if (body.success) {
+      return 'updated';
+    }
+    writes.delete(key);
+    return body.errorType || 'failed';
+  }));
+
+  const settled = await waitForDeliveries(sockets, writes.size);
+  const elapsed = performance.now() - started;
+  loopDelay.disable();
+  const heapAfter = heapUsedMB();
+
+  const { body: stats } = await request('GET', '/api/stats');
+  const missing = sockets.reduce((sum, socket) => sum + (writes.size - socket.received.size), 0);
+
+  const result = {
+    label: args.label || 'server',
+    timestamp: new Date().toISOString(),
+    node: process.version,
+    config: {
+      submits: SUBMITS,
+      confirms: CONFIRMS,
+      concurrency: CONCURRENCY,
+      sockets: SOCKETS,
+      journal: JOURNAL,
+      broadcastWindowMs: parseInt(process.env.BROADCAST_WINDOW_MS, 10) || 100
+    },
+    elapsedMs: +elapsed.toFixed(1),
+    phases: phases,
+    delivery: {
+      ...summarize(deliveries),
+      settled: settled,
+      missing: missing,
+      resyncs: sockets.reduce((sum, socket) => sum + socket.resyncs, 0)
+    },
+    broadcast: summarize(broadcasts),
+    eventLoop: {
+      p50Ms: +(loopDelay.percentile(50) / 1e6).toFixed(3),
+      p99Ms: +(loopDelay.percentile(99) / 1e6).toFixed(3),
+      maxMs: +(loopDelay.max / 1e6).toFixed(3),
+      meanMs: +(loopDelay.mean / 1e6).toFixed(3)
+    },
+    heap: {
+      beforeMB: heapBefore,
+      afterMB: heapAfter,
+      growthMB: +(heapAfter - heapBefore).toFixed(1),
+      gc: Boolean(global.gc)
+    },
+    server: {
+      broadcast: stats.data?.broadcast || null,
+      journal: stats.data?.journal || null
+    }
+  };
+
+  const json = JSON.stringify(result, null, 2);
+  console.log(json);
+  if (args.out) {
+    fs.writeFileSync(args.out, json + '\n');
+  }
+  if (args.baseline) {
+    // 对比表输出到标准错误，不影响标准输出中的JSON
+    const stderr = new console.Console(process.stderr);
+    stderr.log(`与基准结果对比: ${args.baseline}`);
+    stderr.table(compare(JSON.parse(fs.readFileSync(args.baseline, 'utf8')), result));
+  }
+
+  sockets.forEach(socket => socket.close());
+  agent.destroy();
+  fs.rmSync(journalDir, { recursive: true, force: true });
+  process.exit(settled ? 0 : 1);
+}
+
+main().catch(error => {
+  console.error('压测失败:', error);
+  fs.rmSync(journalDir, { recursive: true, force: true });
+  process.exit(1);
+});
@@ -0,0 +1,239 @@
+// WebSocket广播调度器
+// 合并时间窗口内的所有变更，每次刷新只序列化一次并共享同一个Buffer，
+// 发送缓冲积压的客户端会被跳过并标记为待重新同步
+
+const { performance } = require('perf_hooks');
+const WebSocket = require('ws');
+const { Counter, Histogram, exponentialBuckets } = require('./metrics');
+
+const DEFAULT_WINDOW_MS = 100;
+const DEFAULT_MAX_BUFFERED_BYTES = 1024 * 1024; // 1MB
+
+const BYTE_BUCKETS = exponentialBuckets(256, 4, 9); // 256B ~ 16MB
+
+const payloadBytes = new Histogram({
+  name: 'meeting_broadcast_payload_bytes',
+  help: '广播消息序列化后的大小',
+  labelNames: ['type'],
+  buckets: BYTE_BUCKETS
+});
+const serializeDuration = new Histogram({
+  name: 'meeting_broadcast_serialize_duration_seconds',
+  help: '广播消息序列化耗时',
+  labelNames: ['type']
+});
+const flushDuration = new Histogram({
+  name: 'meeting_broadcast_flush_duration_seconds',
+  help: '单次广播刷新耗时（序列化与发送）'
+});
+const sendBacklog = new Histogram({
+  name: 'meeting_ws_send_backlog_bytes',
+  help: '每次刷新时各连接的发送缓冲积压',
+  buckets: [0].concat(BYTE_BUCKETS)
+});
+const skippedSends = new Counter({
+  name: 'meeting_ws_skipped_sends_total',
+  help: '因发送缓冲积压被跳过、待重新同步的连接次数'
+});
+
+class BroadcastScheduler {
+  constructor(options = {}) {
+    this.clients = options.clients;
+    this.windowMs = options.windowMs || DEFAULT_WINDOW_MS;
+    this.maxBufferedBytes = options.maxBufferedBytes || DEFAULT_MAX_BUFFERED_BYTES;
+    this.getTotal = options.getTotal; // () => 参与人数，增量推送只需要总数，O(1)
+    this.getSnapshot = options.getSnapshot; // () => 完整有序榜单，只在发送快照时调用
+    this.onError = options.onError || (() => {});
+
+    this.seq = 0;
+    this.pendingOps = [];
+    this.pendingReset = null;
+    this.resyncSockets = new Map(); // ws -> 快照原因
+    this.timer = null;
+
+    this.metrics = {
+      writes: 0,
+      coalescedWrites: 0,
+      flushes: 0,
+      opsSent: 0,
+      snapshotsSent: 0,
+      skippedSockets: 0,
+      lastPayloadBytes: 0,
+      lastFlushMs: 0,
+      maxFlushMs: 0,
+      totalFlushMs: 0
+    };
+  }
+
+  hasPending() {
+    return this.pendingOps.length > 0 || this.pendingReset !== null;
+  }
+
+  // 加入增量变更，在窗口结束时统一推送
+  enqueue(ops) {
+    this.metrics.writes++;
+    if (this.hasPending()) {
+      this.metrics.coalescedWrites++;
+    }
+    for (const op of ops) {
+      this.pendingOps.push(op);
+    }
+    this.schedule();
+  }
+
+  // 榜单整体重置，窗口内已排队的增量由快照取代
+  reset(reason) {
+    this.metrics.writes++;
+    if (this.hasPending()) {
+      this.metrics.coalescedWrites++;
+    }
+    this.pendingOps = [];
+    this.pendingReset = reason;
+    this.schedule();
+  }
+
+  // 向单个客户端发送快照；有未推送的变更时延后到下次刷新，保证序号连续
+  sendSnapshot(ws, reason) {
+    if (this.hasPending() || ws.bufferedAmount > this.maxBufferedBytes) {
+      this.resyncSockets.set(ws, reason);
+      this.schedule();
+      return;
+    }
+
+    this.send(ws, this.encodeSnapshot(reason));
+    this.metrics.snapshotsSent++;
+  }
+
+  schedule() {
+    if (!this.timer) {
+      this.timer = setTimeout(() => this.flush(), this.windowMs);
+    }
+  }
+
+  encode(message) {
+    const started = process.hrtime.bigint();
+    const buffer = Buffer.from(JSON.stringify(message));
+    serializeDuration.observe({ type: message.type }, Number(process.hrtime.bigint() - started) / 1e9);
+    payloadBytes.observe({ type: message.type }, buffer.length);
+    return buffer;
+  }
+
+  encodeSnapshot(reason) {
+    return this.encode({
+      type: 'initial',
+      reason: reason,
+      seq: this.seq,
+      data: this.getSnapshot(),
+      total: this.getTotal(),
+      timestamp: Date.now()
+    });
+  }
+
+  send(ws, buffer) {
+    try {
+      ws.send(buffer, { binary: false });
+      return true;
+    } catch (error) {
+      this.onError(error);
+      return false;
+    }
+  }
+
+  flush() {
+    this.timer = null;
+    const started = performance.now();
+
+    let shared = null;
+    if (this.hasPending()) {
+      this.seq++;
+      if (this.clients.size === 0) {
+        // 无客户端时只推进序号，新连接会收到最新快照
+      } else if (this.pendingReset !== null) {
+        shared = this.encodeSnapshot(this.pendingReset);
+      } else {
+        shared = this.encode({
+          type: 'delta',
+          seq: this.seq,
+          ops: this.pendingOps,
+          total: this.getTotal(),
+          timestamp: Date.now()
+        });
+        this.metrics.opsSent += this.pendingOps.length;
+      }
+      if (shared) {
+        this.metrics.lastPayloadBytes = shared.length;
+      }
+      this.pendingOps = [];
+      this.pendingReset = null;
+    }
+
+    const snapshots = new Map(); // 原因 -> 本次刷新共享的快照Buffer
+    this.clients.forEach(ws => {
+      if (ws.readyState !== WebSocket.OPEN) return;
+
+      const resyncReason = this.resyncSockets.get(ws);
+      sendBacklog.observe(ws.bufferedAmount);
+      if (ws.bufferedAmount > this.maxBufferedBytes) {
+        if (resyncReason === undefined) {
+          this.resyncSockets.set(ws, 'resync');
+          this.metrics.skippedSockets++;
+          skippedSends.inc();
+        }
+        return;
+      }
+
+      if (resyncReason !== undefined) {
+        if (!snapshots.has(resyncReason)) {
+          snapshots.set(resyncReason, this.encodeSnapshot(resyncReason));
+        }
+        if (this.send(ws, snapshots.get(resyncReason))) {
+          this.resyncSockets.delete(ws);
+          this.metrics.snapshotsSent++;
+        }
+      } else if (shared) {
+        this.send(ws, shared);
+      }
+    });
+
+    for (const ws of this.resyncSockets.keys()) {
+      if (!this.clients.has(ws) || ws.readyState !== WebSocket.OPEN) {
+        this.resyncSockets.delete(ws);
+      }
+    }
+
+    const elapsed = performance.now() - started;
+    flushDuration.observe(elapsed / 1000);
+    this.metrics.flushes++;
+    this.metrics.lastFlushMs = elapsed;
+    this.metrics.maxFlushMs = Math.max(this.metrics.maxFlushMs, elapsed);
+    this.metrics.totalFlushMs += elapsed;
+
+    // 积压的客户端在下个窗口重试
+    if (this.resyncSockets.size > 0) {
+      this.schedule();
+    }
+  }
+
+  getMetrics() {
+    const { totalFlushMs, ...metrics } = this.metrics;
+    return {
+      ...metrics,
+      seq: this.seq,
+      windowMs: this.windowMs,
+      pendingOps: this.pendingOps.length,
+      pendingResync: this.resyncSockets.size,
+      avgFlushMs: metrics.flushes > 0 ? totalFlushMs / metrics.flushes : 0
+    };
+  }
+
+  stop() {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+  }
+}
+
+module.exports = {
+  BroadcastScheduler
+};
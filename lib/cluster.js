@@ -0,0 +1,169 @@
+// 集群模式：主进程持有唯一的权威榜单，工作进程负责HTTP和WebSocket
+// 工作进程的写操作通过IPC请求路由到主进程执行，结果原路返回
+// 主进程也可以向所有工作进程广播命令并汇总各自的结果（如监控指标）
+
+const cluster = require('cluster');
+
+const RPC_REQUEST = 'meeting:rpc:request';
+const RPC_REPLY = 'meeting:rpc:reply';
+const COLLECT_REQUEST = 'meeting:collect:request';
+const COLLECT_REPLY = 'meeting:collect:reply';
+const DEFAULT_TIMEOUT_MS = 10000;
+
+// Node 16 起 isMaster 更名为 isPrimary
+const isPrimary = cluster.isPrimary !== undefined ? cluster.isPrimary : cluster.isMaster;
+
+let stopping = false;
+let nextCollectId = 1;
+
+// 工作进程中向主进程发送命令
+class OwnerClient {
+  constructor(timeoutMs = DEFAULT_TIMEOUT_MS) {
+    this.timeoutMs = timeoutMs;
+    this.nextRequestId = 1;
+    this.pending = new Map(); // requestId -> { resolve, reject, timer }
+
+    process.on('message', (message) => {
+      if (!message || message.channel !== RPC_REPLY) return;
+
+      const request = this.pending.get(message.id);
+      if (!request) return;
+
+      this.pending.delete(message.id);
+      clearTimeout(request.timer);
+      if (message.error) {
+        request.reject(new Error(message.error));
+      } else {
+        request.resolve(message.result);
+      }
+    });
+  }
+
+  request(command) {
+    return new Promise((resolve, reject) => {
+      const id = this.nextRequestId++;
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`主进程响应超时: ${command.type}`));
+      }, this.timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      process.send({ channel: RPC_REQUEST, id: id, command: command });
+    });
+  }
+}
+
+// 主进程中执行工作进程发来的命令，execute(command) 返回 Promise
+function serveOwner(execute, log) {
+  cluster.on('message', (worker, message) => {
+    if (!message || message.channel !== RPC_REQUEST) return;
+
+    execute(message.command)
+      .then(result => ({ channel: RPC_REPLY, id: message.id, result: result }))
+      .catch(error => {
+        log(`执行工作进程命令失败: ${error.message}`, 'error');
+        return { channel: RPC_REPLY, id: message.id, error: error.message };
+      })
+      .then(reply => {
+        if (worker.isConnected()) {
+          worker.send(reply);
+        }
+      });
+  });
+}
+
+// 主进程向所有在线的工作进程发送同一命令，等待全部回复或超时
+// 返回 { results: [{ workerId, result }], missing: [workerId] }，超时或执行失败的进程计入 missing
+function collectFromWorkers(command, timeoutMs = DEFAULT_TIMEOUT_MS) {
+  const workers = Object.values(cluster.workers).filter(worker => worker.isConnected());
+  const id = nextCollectId++;
+  const replies = new Map(); // workerId -> { result } | { error }
+
+  return new Promise(resolve => {
+    let timer = null;
+
+    function finish() {
+      clearTimeout(timer);
+      cluster.removeListener('message', onMessage);
+      const results = [];
+      const missing = [];
+      workers.forEach(worker => {
+        const reply = replies.get(worker.id);
+        if (reply && !reply.error) {
+          results.push({ workerId: worker.id, result: reply.result });
+        } else {
+          missing.push(worker.id);
+        }
+      });
+      resolve({ results: results, missing: missing });
+    }
+
+    function onMessage(worker, message) {
+      if (!message || message.channel !== COLLECT_REPLY || message.id !== id) return;
+      replies.set(worker.id, message);
+      if (replies.size === workers.length) {
+        finish();
+      }
+    }
+
+    if (workers.length === 0) {
+      resolve({ results: [], missing: [] });
+      return;
+    }
+
+    cluster.on('message', onMessage);
+    timer = setTimeout(finish, timeoutMs);
+    workers.forEach(worker => {
+      worker.send({ channel: COLLECT_REQUEST, id: id, command: command });
+    });
+  });
+}
+
+// 工作进程中响应主进程广播的命令，execute(command) 返回结果或 Promise
+function serveWorker(execute, log) {
+  process.on('message', (message) => {
+    if (!message || message.channel !== COLLECT_REQUEST) return;
+
+    Promise.resolve()
+      .then(() => execute(message.command))
+      .then(result => ({ channel: COLLECT_REPLY, id: message.id, result: result }))
+      .catch(error => {
+        log(`执行主进程命令失败: ${error.message}`, 'error');
+        return { channel: COLLECT_REPLY, id: message.id, error: error.message };
+      })
+      .then(reply => {
+        if (process.connected) {
+          process.send(reply);
+        }
+      });
+  });
+}
+
+// 启动工作进程，异常退出时自动重启
+function forkWorkers(count, log) {
+  for (let i = 0; i < count; i++) {
+    cluster.fork();
+  }
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (stopping || worker.exitedAfterDisconnect) return;
+    log(`工作进程 ${worker.id} 异常退出（代码: ${code}，信号: ${signal || '无'}），正在重启`, 'warn');
+    cluster.fork();
+  });
+}
+
+// 关闭所有工作进程，不再自动重启
+function stopWorkers(callback) {
+  stopping = true;
+  cluster.disconnect(callback);
+}
+
+module.exports = {
+  isPrimary,
+  OwnerClient,
+  serveOwner,
+  collectFromWorkers,
+  serveWorker,
+  forkWorkers,
+  stopWorkers
+};
@@ -0,0 +1,298 @@
+// 参与者数据持久化：追加写日志 + 定期快照
+// - 写入先进入内存缓冲，由组提交（group commit）批量 write + fsync，同一批共享一次 fsync
+// - 提交失败时截断到上次成功提交的长度，失败批次的事件不会在重放时出现；截断也失败时停止写入
+// - 日志已提交的事件同步应用到日志自身维护的状态，达到阈值后写快照并截断日志
+// - 启动时加载最新快照并重放日志尾部；事件均为按ID赋值的幂等操作，重复重放结果不变
+
+const fs = require('fs');
+const path = require('path');
+const { performance } = require('perf_hooks');
+
+const SNAPSHOT_FILE = 'snapshot.json';
+const JOURNAL_FILE = 'journal.log';
+const DEFAULT_SNAPSHOT_EVERY = 500;
+
+function createState() {
+  return {
+    participants: new Map(), // participantId -> participant data
+    nextId: 1
+  };
+}
+
+function applyEvent(state, event) {
+  switch (event.type) {
+    case 'create': {
+      const participant = { ...event.participant };
+      state.participants.set(participant.id, participant);
+      state.nextId = Math.max(state.nextId, participant.id + 1);
+      break;
+    }
+    case 'update': {
+      const existing = state.participants.get(event.id);
+      if (existing) {
+        existing.target = event.target;
+        existing.timestamp = event.timestamp;
+      }
+      break;
+    }
+    case 'remove':
+      state.participants.delete(event.id);
+      break;
+    case 'clear':
+      state.participants.clear();
+      state.nextId = 1;
+      break;
+    default:
+      throw new Error(`未知日志事件类型: ${event.type}`);
+  }
+}
+
+// 保存事件副本，避免提交前参与者对象被原地修改
+function cloneEvent(event) {
+  if (event.type === 'create') {
+    return { type: 'create', participant: { ...event.participant } };
+  }
+  return { ...event };
+}
+
+class EventJournal {
+  constructor(options = {}) {
+    this.dir = options.dir;
+    this.snapshotEvery = options.snapshotEvery || DEFAULT_SNAPSHOT_EVERY;
+    this.onError = options.onError || (() => {});
+
+    this.snapshotPath = path.join(this.dir, SNAPSHOT_FILE);
+    this.journalPath = path.join(this.dir, JOURNAL_FILE);
+
+    this.state = createState();
+    this.fd = null;
+    this.committedBytes = 0; // 日志文件中已成功提交的长度
+    this.failure = null; // 回滚失败后日志内容不可信，之后的写入全部拒绝
+    this.pending = []; // { line, event, resolve, reject }
+    this.committing = false;
+    this.commitScheduled = false;
+    this.eventsSinceSnapshot = 0;
+    this.closed = false;
+
+    this.metrics = {
+      events: 0,
+      committedEvents: 0,
+      commits: 0,
+      snapshots: 0,
+      replayedEvents: 0,
+      lastBatchSize: 0,
+      maxBatchSize: 0,
+      lastCommitMs: 0,
+      maxCommitMs: 0,
+      totalCommitMs: 0
+    };
+  }
+
+  // 启动时同步加载快照和日志尾部，返回恢复后的状态
+  load() {
+    fs.mkdirSync(this.dir, { recursive: true });
+
+    if (fs.existsSync(this.snapshotPath)) {
+      const snapshot = JSON.parse(fs.readFileSync(this.snapshotPath, 'utf8'));
+      snapshot.participants.forEach(participant => {
+        this.state.participants.set(participant.id, participant);
+      });
+      this.state.nextId = snapshot.nextId;
+    }
+
+    if (fs.existsSync(this.journalPath)) {
+      // 崩溃时最后一行可能只写了一半，截断到最后一个完整行
+      const content = fs.readFileSync(this.journalPath);
+      const end = content.lastIndexOf(0x0a) + 1;
+      if (end < content.length) {
+        fs.truncateSync(this.journalPath, end);
+      }
+      this.committedBytes = end;
+
+      content.slice(0, end).toString('utf8').split('\n').forEach((line, index) => {
+        if (!line) return;
+        try {
+          applyEvent(this.state, JSON.parse(line));
+          this.metrics.replayedEvents++;
+        } catch (error) {
+          this.onError(new Error(`日志第${index + 1}行损坏，已跳过: ${error.message}`));
+        }
+      });
+    }
+
+    this.fd = fs.openSync(this.journalPath, 'a');
+    this.eventsSinceSnapshot = this.metrics.replayedEvents;
+
+    return {
+      participants: Array.from(this.state.participants.values()).map(p => ({ ...p })),
+      nextId: this.state.nextId
+    };
+  }
+
+  // 追加事件，返回在该事件落盘（fsync）后完成的Promise
+  append(event) {
+    if (this.closed) {
+      return Promise.reject(new Error('日志已关闭'));
+    }
+    if (this.failure) {
+      return Promise.reject(this.failure);
+    }
+
+    const copy = cloneEvent(event);
+    const line = JSON.stringify(copy) + '\n';
+    this.metrics.events++;
+
+    return new Promise((resolve, reject) => {
+      this.pending.push({ line, event: copy, resolve, reject });
+      this.scheduleCommit();
+    });
+  }
+
+  // 同一轮事件循环内的追加合并为一批；提交进行中时新事件等待下一批
+  scheduleCommit() {
+    if (this.committing || this.commitScheduled) return;
+    this.commitScheduled = true;
+    setImmediate(() => {
+      this.commitScheduled = false;
+      this.commit();
+    });
+  }
+
+  async commit() {
+    if (this.pending.length === 0) return;
+    this.committing = true;
+
+    const batch = this.pending;
+    this.pending = [];
+    const started = performance.now();
+
+    try {
+      const data = Buffer.from(batch.map(entry => entry.line).join(''));
+      await writeAll(this.fd, data);
+      await fsyncAsync(this.fd);
+      this.committedBytes += data.length;
+
+      batch.forEach(entry => applyEvent(this.state, entry.event));
+      this.eventsSinceSnapshot += batch.length;
+
+      const elapsed = performance.now() - started;
+      this.metrics.commits++;
+      this.metrics.committedEvents += batch.length;
+      this.metrics.lastBatchSize = batch.length;
+      this.metrics.maxBatchSize = Math.max(this.metrics.maxBatchSize, batch.length);
+      this.metrics.lastCommitMs = elapsed;
+      this.metrics.maxCommitMs = Math.max(this.metrics.maxCommitMs, elapsed);
+      this.metrics.totalCommitMs += elapsed;
+
+      batch.forEach(entry => entry.resolve());
+    } catch (error) {
+      this.onError(error);
+      await this.rollback();
+      batch.forEach(entry => entry.reject(error));
+    }
+
+    try {
+      if (this.eventsSinceSnapshot >= this.snapshotEvery) {
+        await this.compact();
+      }
+    } catch (error) {
+      this.onError(error);
+    }
+
+    this.committing = false;
+    if (this.pending.length > 0) {
+      this.scheduleCommit();
+    }
+  }
+
+  // 去掉失败批次可能已写入的部分，保证日志只包含已向调用方确认的事件
+  async rollback() {
+    try {
+      await truncateAsync(this.fd, this.committedBytes);
+    } catch (error) {
+      this.failure = new Error(`日志回滚失败，已停止写入: ${error.message}`);
+      this.onError(this.failure);
+    }
+  }
+
+  // 将日志维护的状态写成快照（先写临时文件再原子替换），然后截断日志
+  async compact() {
+    const snapshot = JSON.stringify({
+      nextId: this.state.nextId,
+      participants: Array.from(this.state.participants.values()),
+      timestamp: Date.now()
+    });
+
+    const tmpPath = `${this.snapshotPath}.tmp`;
+    await fs.promises.writeFile(tmpPath, snapshot);
+    const tmpHandle = await fs.promises.open(tmpPath, 'r+');
+    try {
+      await tmpHandle.sync();
+    } finally {
+      await tmpHandle.close();
+    }
+    await fs.promises.rename(tmpPath, this.snapshotPath);
+
+    await truncateAsync(this.fd, 0);
+    this.committedBytes = 0;
+    this.eventsSinceSnapshot = 0;
+    this.metrics.snapshots++;
+  }
+
+  // 等待缓冲中的事件全部落盘后关闭
+  async close() {
+    if (this.closed || this.fd === null) return;
+    this.closed = true;
+
+    while (this.committing || this.commitScheduled || this.pending.length > 0) {
+      await new Promise(resolve => setTimeout(resolve, 1));
+    }
+
+    if (this.eventsSinceSnapshot > 0) {
+      await this.compact();
+    }
+    fs.closeSync(this.fd);
+    this.fd = null;
+  }
+
+  getMetrics() {
+    const { totalCommitMs, ...metrics } = this.metrics;
+    return {
+      ...metrics,
+      pendingEvents: this.pending.length,
+      eventsSinceSnapshot: this.eventsSinceSnapshot,
+      avgBatchSize: metrics.commits > 0 ? metrics.committedEvents / metrics.commits : 0,
+      avgCommitMs: metrics.commits > 0 ? totalCommitMs / metrics.commits : 0
+    };
+  }
+}
+
+function writeAll(fd, buffer) {
+  return new Promise((resolve, reject) => {
+    const writeChunk = (offset) => {
+      fs.write(fd, buffer, offset, buffer.length - offset, null, (error, written) => {
+        if (error) return reject(error);
+        if (offset + written < buffer.length) return writeChunk(offset + written);
+        resolve();
+      });
+    };
+    writeChunk(0);
+  });
+}
+
+function fsyncAsync(fd) {
+  return new Promise((resolve, reject) => {
+    fs.fsync(fd, error => (error ? reject(error) : resolve()));
+  });
+}
+
+function truncateAsync(fd, length) {
+  return new Promise((resolve, reject) => {
+    fs.ftruncate(fd, length, error => (error ? reject(error) : resolve()));
+  });
+}
+
+module.exports = {
+  EventJournal,
+  applyEvent
+};
@@ -0,0 +1,254 @@
+// 排行榜有序索引（可索引跳表）
+// 排序规则：金额降序，提交时间升序，ID升序兜底保证全序
+// 插入、更新、删除、名次查询均为 O(log n)
+
+const MAX_LEVEL = 32;
+const LEVEL_PROBABILITY = 0.25;
+
+function compareParticipants(a, b) {
+  if (b.target !== a.target) {
+    return b.target - a.target; // 金额降序
+  }
+  if (a.timestamp !== b.timestamp) {
+    return a.timestamp - b.timestamp; // 时间升序
+  }
+  return a.id - b.id;
+}
+
+function createNode(level, key, value) {
+  return {
+    key: key,
+    value: value,
+    next: new Array(level).fill(null),
+    span: new Array(level).fill(0)
+  };
+}
+
+// NaN 与任何值比较都为 false，这样的键进入跳表后删除和更新无法再定位节点，必须在入口拒绝
+function assertSortable(participant) {
+  if (!Number.isFinite(participant.target) || !Number.isFinite(participant.timestamp)) {
+    throw new RangeError(`排序键无效: id=${participant.id}, target=${participant.target}, timestamp=${participant.timestamp}`);
+  }
+}
+
+// 节点保存排序键的快照，参与者对象被原地修改后仍能定位旧位置
+function snapshotKey(participant) {
+  return {
+    id: participant.id,
+    target: participant.target,
+    timestamp: participant.timestamp
+  };
+}
+
+class LeaderboardIndex {
+  constructor(compare = compareParticipants) {
+    this.compare = compare;
+    this.nodes = new Map(); // participantId -> node
+    this.clear();
+  }
+
+  get size() {
+    return this.length;
+  }
+
+  clear() {
+    this.head = createNode(MAX_LEVEL, null, null);
+    this.level = 1;
+    this.length = 0;
+    this.nodes.clear();
+    this.cachedArray = null;
+  }
+
+  randomLevel() {
+    let level = 1;
+    while (level < MAX_LEVEL && Math.random() < LEVEL_PROBABILITY) {
+      level++;
+    }
+    return level;
+  }
+
+  has(id) {
+    return this.nodes.has(id);
+  }
+
+  // 插入参与者，返回从0开始的名次；排序键不是有限数值时抛出 RangeError，索引保持不变
+  insert(participant) {
+    if (this.nodes.has(participant.id)) {
+      return this.update(participant);
+    }
+    assertSortable(participant);
+
+    const key = snapshotKey(participant);
+    const update = new Array(MAX_LEVEL);
+    const rankAt = new Array(MAX_LEVEL);
+    let x = this.head;
+
+    for (let i = this.level - 1; i >= 0; i--) {
+      rankAt[i] = i === this.level - 1 ? 0 : rankAt[i + 1];
+      while (x.next[i] && this.compare(x.next[i].key, key) < 0) {
+        rankAt[i] += x.span[i];
+        x = x.next[i];
+      }
+      update[i] = x;
+    }
+
+    const level = this.randomLevel();
+    if (level > this.level) {
+      for (let i = this.level; i < level; i++) {
+        rankAt[i] = 0;
+        update[i] = this.head;
+        this.head.span[i] = this.length;
+      }
+      this.level = level;
+    }
+
+    const node = createNode(level, key, participant);
+    for (let i = 0; i < level; i++) {
+      node.next[i] = update[i].next[i];
+      update[i].next[i] = node;
+      node.span[i] = update[i].span[i] - (rankAt[0] - rankAt[i]);
+      update[i].span[i] = rankAt[0] - rankAt[i] + 1;
+    }
+    for (let i = level; i < this.level; i++) {
+      update[i].span[i]++;
+    }
+
+    this.nodes.set(participant.id, node);
+    this.length++;
+    this.cachedArray = null;
+    return rankAt[0];
+  }
+
+  // 删除参与者，返回删除前的名次，不存在时返回-1
+  remove(id) {
+    const node = this.nodes.get(id);
+    if (!node) {
+      return -1;
+    }
+
+    const update = new Array(MAX_LEVEL);
+    let rank = 0;
+    let x = this.head;
+
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (x.next[i] && this.compare(x.next[i].key, node.key) < 0) {
+        rank += x.span[i];
+        x = x.next[i];
+      }
+      update[i] = x;
+    }
+
+    for (let i = 0; i < this.level; i++) {
+      if (update[i].next[i] === node) {
+        update[i].span[i] += node.span[i] - 1;
+        update[i].next[i] = node.next[i];
+      } else {
+        update[i].span[i]--;
+      }
+    }
+
+    while (this.level > 1 && this.head.next[this.level - 1] === null) {
+      this.level--;
+    }
+
+    this.nodes.delete(id);
+    this.length--;
+    this.cachedArray = null;
+    return rank;
+  }
+
+  // 参与者金额或时间变化后重新定位，返回新旧名次
+  update(participant) {
+    assertSortable(participant);
+    const from = this.remove(participant.id);
+    const to = this.insert(participant);
+    return { from, to };
+  }
+
+  // 查询名次（从0开始），不存在时返回-1
+  rank(id) {
+    const node = this.nodes.get(id);
+    if (!node) {
+      return -1;
+    }
+
+    let rank = 0;
+    let x = this.head;
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (x.next[i] && this.compare(x.next[i].key, node.key) <= 0) {
+        rank += x.span[i];
+        x = x.next[i];
+      }
+      if (x === node) {
+        return rank - 1;
+      }
+    }
+    return -1;
+  }
+
+  // 按名次（从0开始）取参与者
+  at(rank) {
+    if (rank < 0 || rank >= this.length) {
+      return null;
+    }
+
+    const target = rank + 1;
+    let traversed = 0;
+    let x = this.head;
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (x.next[i] && traversed + x.span[i] <= target) {
+        traversed += x.span[i];
+        x = x.next[i];
+      }
+      if (traversed === target) {
+        return x.value;
+      }
+    }
+    return null;
+  }
+
+  // 按名次区间取参与者，定位 O(log n)，遍历 O(end - start)
+  slice(start = 0, end = this.length) {
+    const result = [];
+    start = Math.max(0, start);
+    end = Math.min(this.length, end);
+    if (start >= end) {
+      return result;
+    }
+
+    const target = start + 1;
+    let traversed = 0;
+    let x = this.head;
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (x.next[i] && traversed + x.span[i] <= target) {
+        traversed += x.span[i];
+        x = x.next[i];
+      }
+    }
+
+    for (let i = start; i < end && x; i++) {
+      result.push(x.value);
+      x = x.next[0];
+    }
+    return result;
+  }
+
+  // 完整有序列表，写入前重复读取直接复用同一数组（调用方不得修改）
+  toArray() {
+    if (!this.cachedArray) {
+      const result = new Array(this.length);
+      let x = this.head.next[0];
+      for (let i = 0; x; i++) {
+        result[i] = x.value;
+        x = x.next[0];
+      }
+      this.cachedArray = result;
+    }
+    return this.cachedArray;
+  }
+}
+
+module.exports = {
+  LeaderboardIndex,
+  compareParticipants
+};
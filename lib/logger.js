@@ -0,0 +1,139 @@
+// 异步日志：按级别过滤后写入内存缓冲，在下一轮事件循环批量异步写出，请求处理过程中不同步写标准输出
+// - LOG_LEVEL: debug | info | warn | error | silent，默认 info
+// - 同一时间只有一个写操作在进行，期间产生的日志合并到下一批
+// - 写出跟不上时超过缓冲上限的日志被丢弃（error 级别除外），恢复后输出丢弃条数
+// - close() 等待缓冲写完；进程退出时同步写出剩余日志
+
+const fs = require('fs');
+const { Counter } = require('./metrics');
+
+const LEVELS = {
+  debug: 10,
+  info: 20,
+  warn: 30,
+  error: 40,
+  silent: Infinity
+};
+const DEFAULT_LEVEL = 'info';
+const DEFAULT_MAX_BUFFER_BYTES = 1024 * 1024; // 1MB
+
+const droppedLines = new Counter({
+  name: 'meeting_log_dropped_lines_total',
+  help: '日志缓冲已满时丢弃的日志行数'
+});
+
+class Logger {
+  constructor(options = {}) {
+    this.level = LEVELS[options.level] !== undefined ? options.level : DEFAULT_LEVEL;
+    this.threshold = LEVELS[this.level];
+    this.tag = options.tag || '';
+    this.fd = options.fd !== undefined ? options.fd : 1; // 默认标准输出
+    this.maxBufferBytes = options.maxBufferBytes || DEFAULT_MAX_BUFFER_BYTES;
+
+    this.buffer = [];
+    this.bufferedBytes = 0;
+    this.dropped = 0;
+    this.writing = false;
+    this.scheduled = false;
+    this.drainCallbacks = [];
+
+    this.log = this.log.bind(this);
+    process.on('exit', () => this.flushSync());
+  }
+
+  enabled(level) {
+    return (LEVELS[level] || LEVELS[DEFAULT_LEVEL]) >= this.threshold;
+  }
+
+  log(message, level = 'info') {
+    if (!this.enabled(level)) return;
+
+    const line = `[${new Date().toISOString()}]${this.tag} [${level.toUpperCase()}] ${message}\n`;
+    if (this.bufferedBytes + line.length > this.maxBufferBytes && level !== 'error') {
+      this.dropped++;
+      droppedLines.inc();
+      return;
+    }
+
+    this.buffer.push(line);
+    this.bufferedBytes += line.length;
+    this.schedule();
+  }
+
+  schedule() {
+    if (this.scheduled || this.writing) return;
+    this.scheduled = true;
+    setImmediate(() => {
+      this.scheduled = false;
+      this.flush();
+    });
+  }
+
+  takeChunk() {
+    if (this.dropped > 0) {
+      this.buffer.push(`[${new Date().toISOString()}]${this.tag} [WARN] 日志写出过慢，已丢弃${this.dropped}条日志\n`);
+      this.dropped = 0;
+    }
+    const chunk = this.buffer.join('');
+    this.buffer = [];
+    this.bufferedBytes = 0;
+    return chunk;
+  }
+
+  flush() {
+    if (this.writing) return;
+    if (this.buffer.length === 0 && this.dropped === 0) {
+      this.drained();
+      return;
+    }
+
+    this.writing = true;
+    this.write(Buffer.from(this.takeChunk()), 0);
+  }
+
+  write(data, offset) {
+    fs.write(this.fd, data, offset, data.length - offset, null, (error, written) => {
+      if (error && error.code === 'EAGAIN') {
+        setTimeout(() => this.write(data, offset), 10);
+        return;
+      }
+      if (!error && offset + written < data.length) {
+        this.write(data, offset + written);
+        return;
+      }
+
+      this.writing = false;
+      this.flush();
+    });
+  }
+
+  drained() {
+    const callbacks = this.drainCallbacks;
+    this.drainCallbacks = [];
+    callbacks.forEach(callback => callback());
+  }
+
+  // 等待已缓冲的日志全部写出
+  close() {
+    return new Promise(resolve => {
+      this.drainCallbacks.push(resolve);
+      if (!this.writing && !this.scheduled) {
+        this.flush();
+      }
+    });
+  }
+
+  flushSync() {
+    if (this.buffer.length === 0 && this.dropped === 0) return;
+    try {
+      fs.writeSync(this.fd, this.takeChunk());
+    } catch (error) {
+      // 退出阶段写出失败时无处报告，忽略
+    }
+  }
+}
+
+module.exports = {
+  Logger,
+  LEVELS
+};
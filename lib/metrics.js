@@ -0,0 +1,300 @@
+// Prometheus 文本格式指标（无外部依赖）
+// - Counter / Gauge / Histogram，支持标签；Gauge 可通过 collect 回调在采集时取值
+// - 各模块在模块级创建指标，注册到进程内的默认 registry
+// - 集群模式下主进程的指标经IPC取回，带 process 标签与工作进程的指标合并输出
+// - startRuntimeMetrics(): 事件循环延迟（monitorEventLoopDelay）、GC暂停、内存
+
+const { monitorEventLoopDelay, PerformanceObserver, constants } = require('perf_hooks');
+
+const CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+// 秒：0.1ms ~ 2.5s
+const DEFAULT_BUCKETS = [0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5];
+
+function exponentialBuckets(start, factor, count) {
+  return Array.from({ length: count }, (_, index) => start * Math.pow(factor, index));
+}
+
+function formatValue(value) {
+  if (Number.isFinite(value)) return String(value);
+  if (Number.isNaN(value)) return 'NaN';
+  return value > 0 ? '+Inf' : '-Inf';
+}
+
+function escapeLabel(value) {
+  return String(value).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+}
+
+function formatLabels(labels) {
+  const keys = Object.keys(labels);
+  if (keys.length === 0) return '';
+  return `{${keys.map(key => `${key}="${escapeLabel(labels[key])}"`).join(',')}}`;
+}
+
+class Registry {
+  constructor() {
+    this.collectors = new Map(); // 名称 -> 指标或采集器
+  }
+
+  register(name, collector) {
+    if (this.collectors.has(name)) {
+      throw new Error(`指标重复注册: ${name}`);
+    }
+    this.collectors.set(name, collector);
+  }
+
+  // 返回指标族数组 [{ name, help, type, samples: [{ name, labels, value }] }]，constLabels 附加到每个样本
+  collect(constLabels = {}) {
+    const families = [];
+    this.collectors.forEach(collector => {
+      [].concat(collector.collect()).forEach(family => {
+        families.push({
+          ...family,
+          samples: family.samples.map(sample => ({
+            name: sample.name,
+            labels: { ...constLabels, ...sample.labels },
+            value: sample.value
+          }))
+        });
+      });
+    });
+    return families;
+  }
+}
+
+// 同名指标族（如工作进程与主进程各自的指标）合并后输出
+function render(families) {
+  const merged = new Map();
+  families.forEach(family => {
+    const existing = merged.get(family.name);
+    if (existing) {
+      existing.samples.push(...family.samples);
+    } else {
+      merged.set(family.name, { ...family, samples: family.samples.slice() });
+    }
+  });
+
+  const lines = [];
+  merged.forEach(family => {
+    lines.push(`# HELP ${family.name} ${family.help}`);
+    lines.push(`# TYPE ${family.name} ${family.type}`);
+    family.samples.forEach(sample => {
+      lines.push(`${sample.name}${formatLabels(sample.labels)} ${formatValue(sample.value)}`);
+    });
+  });
+  return lines.join('\n') + '\n';
+}
+
+const registry = new Registry();
+
+// 标签参数可省略：inc() / inc(2) / inc({ result: 'ok' }) / inc({ result: 'ok' }, 2)
+function splitArgs(labelsOrValue, value, defaultValue) {
+  if (typeof labelsOrValue === 'object' && labelsOrValue !== null) {
+    return [labelsOrValue, value === undefined ? defaultValue : value];
+  }
+  return [{}, labelsOrValue === undefined ? defaultValue : labelsOrValue];
+}
+
+class Metric {
+  constructor(type, options) {
+    this.type = type;
+    this.name = options.name;
+    this.help = options.help;
+    this.labelNames = options.labelNames || [];
+    this.series = new Map(); // 标签值组合 -> 序列
+    (options.registry || registry).register(this.name, this);
+  }
+
+  getSeries(labels) {
+    const key = this.labelNames.map(name => labels[name]).join('\u0001');
+    let series = this.series.get(key);
+    if (!series) {
+      const seriesLabels = {};
+      this.labelNames.forEach(name => {
+        seriesLabels[name] = labels[name] === undefined ? '' : labels[name];
+      });
+      series = this.createSeries(seriesLabels);
+      this.series.set(key, series);
+    }
+    return series;
+  }
+
+  createSeries(labels) {
+    return { labels: labels, value: 0 };
+  }
+
+  collect() {
+    const samples = [];
+    this.series.forEach(series => {
+      samples.push({ name: this.name, labels: series.labels, value: series.value });
+    });
+    return { name: this.name, help: this.help, type: this.type, samples: samples };
+  }
+}
+
+class Counter extends Metric {
+  constructor(options) {
+    super('counter', options);
+    if (this.labelNames.length === 0) this.getSeries({});
+  }
+
+  inc(labelsOrValue, value) {
+    const [labels, amount] = splitArgs(labelsOrValue, value, 1);
+    this.getSeries(labels).value += amount;
+  }
+}
+
+class Gauge extends Metric {
+  constructor(options) {
+    super('gauge', options);
+    this.collectValue = options.collect || null; // () => number | [{ labels, value }]
+    if (this.labelNames.length === 0 && !this.collectValue) this.getSeries({});
+  }
+
+  set(labelsOrValue, value) {
+    const [labels, amount] = splitArgs(labelsOrValue, value, 0);
+    this.getSeries(labels).value = amount;
+  }
+
+  collect() {
+    if (this.collectValue) {
+      const result = this.collectValue();
+      [].concat(typeof result === 'number' ? { labels: {}, value: result } : result).forEach(({ labels, value }) => {
+        this.set(labels, value);
+      });
+    }
+    return super.collect();
+  }
+}
+
+class Histogram extends Metric {
+  constructor(options) {
+    super('histogram', options);
+    this.buckets = (options.buckets || DEFAULT_BUCKETS).slice().sort((a, b) => a - b);
+    if (this.labelNames.length === 0) this.getSeries({});
+  }
+
+  createSeries(labels) {
+    return { labels: labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+  }
+
+  observe(labelsOrValue, value) {
+    const [labels, amount] = splitArgs(labelsOrValue, value, 0);
+    const series = this.getSeries(labels);
+    const buckets = this.buckets;
+    for (let i = 0; i < buckets.length; i++) {
+      if (amount <= buckets[i]) {
+        series.counts[i]++;
+        break;
+      }
+    }
+    series.sum += amount;
+    series.count++;
+  }
+
+  // 返回结束计时的函数，调用时可补充标签，返回耗时（秒）
+  startTimer(labels = {}) {
+    const started = process.hrtime.bigint();
+    return (endLabels = {}) => {
+      const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+      this.observe({ ...labels, ...endLabels }, seconds);
+      return seconds;
+    };
+  }
+
+  collect() {
+    const samples = [];
+    this.series.forEach(series => {
+      let cumulative = 0;
+      this.buckets.forEach((bucket, index) => {
+        cumulative += series.counts[index];
+        samples.push({ name: `${this.name}_bucket`, labels: { ...series.labels, le: formatValue(bucket) }, value: cumulative });
+      });
+      samples.push({ name: `${this.name}_bucket`, labels: { ...series.labels, le: '+Inf' }, value: series.count });
+      samples.push({ name: `${this.name}_sum`, labels: series.labels, value: series.sum });
+      samples.push({ name: `${this.name}_count`, labels: series.labels, value: series.count });
+    });
+    return { name: this.name, help: this.help, type: this.type, samples: samples };
+  }
+}
+
+const GC_KINDS = {
+  [constants.NODE_PERFORMANCE_GC_MINOR]: 'minor',
+  [constants.NODE_PERFORMANCE_GC_MAJOR]: 'major',
+  [constants.NODE_PERFORMANCE_GC_INCREMENTAL]: 'incremental',
+  [constants.NODE_PERFORMANCE_GC_WEAKCB]: 'weakcb'
+};
+
+let runtimeStarted = false;
+
+// 进程运行时指标；事件循环延迟在每次采集后重置，反映两次抓取之间的情况
+function startRuntimeMetrics(target = registry) {
+  if (runtimeStarted) return;
+  runtimeStarted = true;
+
+  const loopDelay = monitorEventLoopDelay({ resolution: 10 });
+  loopDelay.enable();
+  const toSeconds = nanoseconds => (Number.isFinite(nanoseconds) ? nanoseconds / 1e9 : 0);
+
+  target.register('nodejs_eventloop_delay', {
+    collect() {
+      const values = {
+        min: toSeconds(loopDelay.min),
+        max: toSeconds(loopDelay.max),
+        mean: toSeconds(loopDelay.mean),
+        p50: toSeconds(loopDelay.percentile(50)),
+        p90: toSeconds(loopDelay.percentile(90)),
+        p99: toSeconds(loopDelay.percentile(99))
+      };
+      loopDelay.reset();
+      return Object.keys(values).map(key => ({
+        name: `nodejs_eventloop_delay_${key}_seconds`,
+        help: `事件循环延迟${key}（自上次采集以来）`,
+        type: 'gauge',
+        samples: [{ name: `nodejs_eventloop_delay_${key}_seconds`, labels: {}, value: values[key] }]
+      }));
+    }
+  });
+
+  const gcDuration = new Histogram({
+    name: 'nodejs_gc_duration_seconds',
+    help: 'GC暂停耗时',
+    labelNames: ['kind'],
+    buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2],
+    registry: target
+  });
+  const observer = new PerformanceObserver(list => {
+    list.getEntries().forEach(entry => {
+      const kind = entry.detail ? entry.detail.kind : entry.kind;
+      gcDuration.observe({ kind: GC_KINDS[kind] || 'unknown' }, entry.duration / 1000);
+    });
+  });
+  observer.observe({ entryTypes: ['gc'] });
+
+  const startTime = Math.round(Date.now() / 1000 - process.uptime());
+  target.register('process_memory', {
+    collect() {
+      const memory = process.memoryUsage();
+      const gauge = (name, help, value) => ({ name, help, type: 'gauge', samples: [{ name, labels: {}, value }] });
+      return [
+        gauge('process_resident_memory_bytes', '常驻内存', memory.rss),
+        gauge('nodejs_heap_size_used_bytes', '已使用堆内存', memory.heapUsed),
+        gauge('nodejs_heap_size_total_bytes', '堆内存总量', memory.heapTotal),
+        gauge('nodejs_external_memory_bytes', '堆外内存', memory.external),
+        gauge('process_start_time_seconds', '进程启动时间（Unix时间戳）', startTime)
+      ];
+    }
+  });
+}
+
+module.exports = {
+  CONTENT_TYPE,
+  Registry,
+  Counter,
+  Gauge,
+  Histogram,
+  registry,
+  render,
+  exponentialBuckets,
+  startRuntimeMetrics
+};
@@ -0,0 +1,76 @@
+// 人员去重索引：按规范化后的（机构，姓名）查找参与者ID，O(1)
+// 规范化规则可选，默认不启用（与原先一致，只去除首尾空白后精确匹配）：
+// - width: 全角字符转半角（NFKC）
+// - space: 去除所有空白
+// - case:  忽略大小写
+
+const NORMALIZE_RULES = ['width', 'space', 'case'];
+
+function parseNormalizeRules(value) {
+  if (value === undefined || value === null || value === '' || value === 'none') {
+    return [];
+  }
+  return String(value).split(',')
+    .map(rule => rule.trim())
+    .filter(rule => NORMALIZE_RULES.includes(rule));
+}
+
+function normalizeText(text, rules) {
+  let result = String(text).trim();
+  if (rules.includes('width')) {
+    result = result.normalize('NFKC');
+  }
+  if (rules.includes('space')) {
+    result = result.replace(/\s+/g, '');
+  }
+  if (rules.includes('case')) {
+    result = result.toLowerCase();
+  }
+  return result;
+}
+
+class PersonIndex {
+  constructor(rules = []) {
+    this.rules = rules;
+    this.keys = new Map(); // 规范化键 -> participantId
+  }
+
+  get size() {
+    return this.keys.size;
+  }
+
+  key(organization, name) {
+    return `${normalizeText(organization, this.rules)}\u0000${normalizeText(name, this.rules)}`;
+  }
+
+  get(organization, name) {
+    const id = this.keys.get(this.key(organization, name));
+    return id === undefined ? null : id;
+  }
+
+  // 同一键已有其他参与者时保留先登记的一方
+  add(participant) {
+    const key = this.key(participant.organization, participant.name);
+    if (!this.keys.has(key)) {
+      this.keys.set(key, participant.id);
+    }
+  }
+
+  remove(participant) {
+    const key = this.key(participant.organization, participant.name);
+    if (this.keys.get(key) === participant.id) {
+      this.keys.delete(key);
+    }
+  }
+
+  clear() {
+    this.keys.clear();
+  }
+}
+
+module.exports = {
+  PersonIndex,
+  NORMALIZE_RULES,
+  normalizeText,
+  parseNormalizeRules
+};
@@ -0,0 +1,100 @@
+// 发布订阅后端，用于把榜单变更分发到各个进程的WebSocket连接
+// 后端需实现 publish(topic, message) / subscribe(topic, handler) / close()：
+// - local: 进程内事件，单进程模式使用
+// - ipc:   Node cluster 进程间通信，由主进程转发给所有工作进程，无需外部服务
+// 跨主机部署时可按同样接口接入 Redis 等外部消息服务
+
+const cluster = require('cluster');
+const EventEmitter = require('events');
+
+const IPC_CHANNEL = 'meeting:pubsub';
+
+class LocalPubSub {
+  constructor() {
+    this.emitter = new EventEmitter();
+    this.emitter.setMaxListeners(0);
+  }
+
+  publish(topic, message) {
+    this.emitter.emit(topic, message);
+  }
+
+  subscribe(topic, handler) {
+    this.emitter.on(topic, handler);
+  }
+
+  close() {
+    this.emitter.removeAllListeners();
+  }
+}
+
+class IpcPubSub {
+  constructor() {
+    this.local = new LocalPubSub();
+
+    if (cluster.isWorker) {
+      this.onMessage = (envelope) => {
+        if (envelope && envelope.channel === IPC_CHANNEL) {
+          this.local.publish(envelope.topic, envelope.message);
+        }
+      };
+      process.on('message', this.onMessage);
+    } else {
+      // 主进程转发工作进程发布的消息
+      this.onMessage = (worker, envelope) => {
+        if (envelope && envelope.channel === IPC_CHANNEL) {
+          this.relay(envelope);
+        }
+      };
+      cluster.on('message', this.onMessage);
+    }
+  }
+
+  publish(topic, message) {
+    const envelope = { channel: IPC_CHANNEL, topic: topic, message: message };
+    if (cluster.isWorker) {
+      process.send(envelope);
+    } else {
+      this.relay(envelope);
+    }
+  }
+
+  relay(envelope) {
+    Object.values(cluster.workers).forEach(worker => {
+      if (worker.isConnected()) {
+        worker.send(envelope);
+      }
+    });
+    this.local.publish(envelope.topic, envelope.message);
+  }
+
+  subscribe(topic, handler) {
+    this.local.subscribe(topic, handler);
+  }
+
+  close() {
+    if (cluster.isWorker) {
+      process.removeListener('message', this.onMessage);
+    } else {
+      cluster.removeListener('message', this.onMessage);
+    }
+    this.local.close();
+  }
+}
+
+function createPubSub(backend) {
+  switch (backend) {
+    case 'local':
+      return new LocalPubSub();
+    case 'ipc':
+      return new IpcPubSub();
+    default:
+      throw new Error(`未知的发布订阅后端: ${backend}`);
+  }
+}
+
+module.exports = {
+  LocalPubSub,
+  IpcPubSub,
+  createPubSub
+};
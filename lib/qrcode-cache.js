@@ -0,0 +1,162 @@
+// 二维码缓存：提交地址在运行期间不变，预先渲染后直接返回内存中的Buffer
+// - 支持 svg（原生矢量，带边框和提示文字）与 png 两种格式及多种尺寸
+// - 变体数量有上限，按最近使用淘汰（LRU）
+// - 每个变体带强ETag，提交地址变化时整体失效
+
+const crypto = require('crypto');
+const QRCode = require('qrcode');
+
+const FORMATS = {
+  svg: 'image/svg+xml',
+  png: 'image/png'
+};
+const DEFAULT_FORMAT = 'svg';
+const DEFAULT_SIZE = 256;
+const MIN_SIZE = 128;
+const MAX_SIZE = 1024;
+const SIZE_STEP = 32; // 尺寸按步长取整，限制变体数量
+const DEFAULT_MAX_ENTRIES = 16;
+
+const QR_OPTIONS = {
+  margin: 2,
+  color: {
+    dark: '#000000',
+    light: '#FFFFFF'
+  }
+};
+
+function normalizeSize(value) {
+  const size = parseInt(value, 10);
+  if (!Number.isFinite(size)) {
+    return DEFAULT_SIZE;
+  }
+  const clamped = Math.min(MAX_SIZE, Math.max(MIN_SIZE, size));
+  return Math.round(clamped / SIZE_STEP) * SIZE_STEP;
+}
+
+// 与原接口一致的卡片样式：二维码外加边框和提示文字，整体按尺寸等比缩放
+function renderCard(qrSvg, size) {
+  const scale = size / DEFAULT_SIZE;
+  const width = Math.round(300 * scale);
+  const height = Math.round(320 * scale);
+  const qr = qrSvg.trim().replace('<svg ', '<svg x="22" y="22" ');
+
+  return `<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="${width}" height="${height}" viewBox="0 0 300 320">
+  <rect width="300" height="320" fill="white" stroke="black" stroke-width="2"/>
+  ${qr}
+  <text x="150" y="295" text-anchor="middle" font-family="Arial, sans-serif" font-size="14" fill="black">扫描填写信息</text>
+</svg>`;
+}
+
+function createEntry(buffer, contentType) {
+  const hash = crypto.createHash('sha1').update(buffer).digest('base64').replace(/=+$/, '');
+  return {
+    buffer: buffer,
+    contentType: contentType,
+    etag: `"${hash}"`
+  };
+}
+
+class QRCodeCache {
+  constructor(options = {}) {
+    this.url = options.url;
+    this.maxEntries = options.maxEntries || DEFAULT_MAX_ENTRIES;
+    this.entries = new Map(); // `${format}:${size}` -> entry，按使用顺序排列
+    this.rendering = new Map(); // 正在渲染的变体，避免重复渲染
+    this.hits = 0;
+    this.misses = 0;
+  }
+
+  // 提交地址变化时清空所有变体
+  setUrl(url) {
+    if (url !== this.url) {
+      this.url = url;
+      this.entries.clear();
+      this.rendering.clear();
+    }
+  }
+
+  parseVariant(query = {}) {
+    const format = query.format ? String(query.format).toLowerCase() : DEFAULT_FORMAT;
+    if (!FORMATS[format]) {
+      return null;
+    }
+    return { format: format, size: normalizeSize(query.size) };
+  }
+
+  async get(variant) {
+    const key = `${variant.format}:${variant.size}`;
+    const cached = this.entries.get(key);
+    if (cached) {
+      this.hits++;
+      this.entries.delete(key);
+      this.entries.set(key, cached);
+      return cached;
+    }
+
+    this.misses++;
+    if (!this.rendering.has(key)) {
+      const url = this.url;
+      const rendering = this.render(variant)
+        .then(entry => {
+          if (url === this.url) {
+            this.store(key, entry);
+          }
+          return entry;
+        })
+        .finally(() => {
+          if (this.rendering.get(key) === rendering) {
+            this.rendering.delete(key);
+          }
+        });
+      this.rendering.set(key, rendering);
+    }
+    return this.rendering.get(key);
+  }
+
+  async render({ format, size }) {
+    if (format === 'png') {
+      const buffer = await QRCode.toBuffer(this.url, { ...QR_OPTIONS, type: 'png', width: size });
+      return createEntry(buffer, FORMATS.png);
+    }
+
+    const qrSvg = await QRCode.toString(this.url, { ...QR_OPTIONS, type: 'svg', width: 256 });
+    return createEntry(Buffer.from(renderCard(qrSvg, size)), FORMATS.svg);
+  }
+
+  store(key, entry) {
+    this.entries.set(key, entry);
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  // 启动时预渲染默认变体
+  warm() {
+    return Promise.all(Object.keys(FORMATS).map(format => this.get({ format: format, size: DEFAULT_SIZE })));
+  }
+
+  getMetrics() {
+    return {
+      entries: this.entries.size,
+      hits: this.hits,
+      misses: this.misses
+    };
+  }
+}
+
+// If-None-Match 可能包含多个ETag或*
+function matchesETag(header, etag) {
+  if (!header) return false;
+  if (header.trim() === '*') return true;
+  return header.split(',').some(tag => {
+    const value = tag.trim();
+    return value === etag || value === `W/${etag}`;
+  });
+}
+
+module.exports = {
+  QRCodeCache,
+  matchesETag
+};
@@ -0,0 +1,386 @@
+// 参与者数据存储
+// - ParticipantStore: 权威数据（单进程模式或集群主进程持有），所有写操作在此执行，
+//   变更以带版本号的消息发布：{ type: 'delta', version, ops } / { type: 'reset', version, reason, data }
+//   写操作先写日志：事件落盘后才修改内存、发布变更，落盘失败时内存和大屏都不会出现这次写入；
+//   落盘按追加顺序完成，内存中应用变更的顺序与日志重放的顺序一致
+// - LeaderboardReplica: 集群工作进程中的只读副本，按版本号顺序应用变更，缺号时重新拉取快照
+
+const { LeaderboardIndex } = require('./leaderboard');
+const { PersonIndex } = require('./person-index');
+const { Counter, Histogram } = require('./metrics');
+
+const indexDuration = new Histogram({
+  name: 'meeting_leaderboard_index_duration_seconds',
+  help: '榜单有序索引更新耗时（insert/update/remove 为单次操作，rebuild 为整体重建）',
+  labelNames: ['op'],
+  buckets: [0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.01, 0.1]
+});
+const rateLimitRejections = new Counter({
+  name: 'meeting_rate_limit_rejections_total',
+  help: '因提交过于频繁被拒绝的请求数'
+});
+
+// 无效金额在写日志前拒绝，避免日志中出现重放时无法建立索引的事件
+function assertTarget(target) {
+  if (!Number.isFinite(target)) {
+    throw new RangeError(`目标金额无效: ${target}`);
+  }
+}
+
+// 记录单次索引操作的耗时
+function timeIndex(op, fn) {
+  const started = process.hrtime.bigint();
+  const result = fn();
+  indexDuration.observe({ op: op }, Number(process.hrtime.bigint() - started) / 1e9);
+  return result;
+}
+
+class ParticipantStore {
+  constructor(options = {}) {
+    this.maxParticipants = options.maxParticipants;
+    this.rateLimitMs = options.rateLimitMs;
+    this.journal = options.journal || null;
+    this.publish = options.publish || (() => {});
+
+    this.participants = new Map(); // participantId -> participant data
+    this.leaderboard = new LeaderboardIndex(); // 按金额降序、时间升序排列的有序索引
+    this.personIndex = new PersonIndex(options.normalizeRules); // 规范化（机构，姓名）-> participantId
+    this.submitCache = new Map(); // ip -> last submit time
+    this.reservedIds = new Set(); // 已分配编号、尚未落盘的新增
+    this.pendingPersons = new Map(); // 尚未落盘的新增的人员键 -> 落盘并应用后完成的Promise
+    this.nextId = 1;
+    this.lastUpdateTime = 0;
+    this.version = 0;
+  }
+
+  // 从快照和日志恢复数据，返回恢复的条数
+  load() {
+    if (!this.journal) return 0;
+
+    const recovered = this.journal.load();
+    recovered.participants.forEach(participant => this.index(participant));
+    this.nextId = recovered.nextId;
+    return recovered.participants.length;
+  }
+
+  execute(command) {
+    switch (command.type) {
+      case 'submit':
+        return this.submit(command);
+      case 'confirm':
+        return this.confirm(command);
+      case 'remove':
+        return this.remove(command);
+      case 'clear':
+        return this.clear();
+      case 'snapshot':
+        return Promise.resolve(this.snapshot());
+      case 'stats':
+        return Promise.resolve(this.getStats());
+      default:
+        return Promise.reject(new Error(`未知命令: ${command.type}`));
+    }
+  }
+
+  checkRateLimit(ip) {
+    const lastSubmit = this.submitCache.get(ip) || 0;
+    const now = Date.now();
+
+    if (now - lastSubmit < this.rateLimitMs) {
+      rateLimitRejections.inc();
+      return false;
+    }
+
+    this.submitCache.set(ip, now);
+    return true;
+  }
+
+  pruneRateLimit(maxAgeMs) {
+    const now = Date.now();
+    for (const [ip, timestamp] of this.submitCache.entries()) {
+      if (now - timestamp > maxAgeMs) {
+        this.submitCache.delete(ip);
+      }
+    }
+  }
+
+  findDuplicatePerson(organization, name) {
+    const id = this.personIndex.get(organization, name);
+    return id === null ? null : this.participants.get(id) || null;
+  }
+
+  async submit({ ip, organization, name, target }) {
+    assertTarget(target);
+    if (!this.checkRateLimit(ip)) {
+      return { status: 'rate_limited' };
+    }
+
+    // 同一人员的新增正在落盘时等待其结果，再按最新数据判断是否重复
+    const key = this.personIndex.key(organization, name);
+    while (this.pendingPersons.has(key)) {
+      await this.pendingPersons.get(key);
+    }
+
+    // 检查是否存在重复人员（同一机构+同一姓名）
+    const existing = this.findDuplicatePerson(organization, name);
+    if (existing) {
+      return { status: 'duplicate', participant: existing };
+    }
+
+    // 参与人数检查（只有新增时才检查），尚未落盘的新增也占用名额
+    if (this.participants.size + this.reservedIds.size >= this.maxParticipants) {
+      return { status: 'full' };
+    }
+
+    const participant = {
+      id: this.nextId++,
+      organization: organization,
+      name: name,
+      target: target,
+      timestamp: Date.now()
+    };
+
+    let settle;
+    this.reservedIds.add(participant.id);
+    this.pendingPersons.set(key, new Promise(resolve => {
+      settle = resolve;
+    }));
+
+    try {
+      await this.record({ type: 'create', participant: participant });
+
+      const rank = this.index(participant);
+      this.lastUpdateTime = participant.timestamp;
+      this.publishDelta([{ op: 'insert', rank: rank, participant: participant }]);
+    } finally {
+      this.reservedIds.delete(participant.id);
+      this.pendingPersons.delete(key);
+      settle();
+    }
+
+    return { status: 'created', participant: participant };
+  }
+
+  async confirm({ id, target }) {
+    assertTarget(target);
+    if (!this.participants.has(id)) {
+      return { status: 'not_found' };
+    }
+
+    const timestamp = Date.now();
+    await this.record({ type: 'update', id: id, target: target, timestamp: timestamp });
+
+    // 落盘期间参与者可能已被删除或清空，与日志重放时忽略该更新一致
+    const existing = this.participants.get(id);
+    if (!existing) {
+      return { status: 'not_found' };
+    }
+
+    const oldTarget = existing.target;
+    existing.target = target;
+    existing.timestamp = timestamp;
+    const { from, to } = timeIndex('update', () => this.leaderboard.update(existing));
+    this.lastUpdateTime = timestamp;
+    this.publishDelta([from === to
+      ? { op: 'update', rank: to, participant: existing }
+      : { op: 'move', from: from, to: to, participant: existing }]);
+
+    return { status: 'updated', participant: existing, oldTarget: oldTarget };
+  }
+
+  // 删除单个参与者只作为存储命令保留，没有对外的HTTP接口：
+  // 可经 execute({ type: 'remove' }) 或集群IPC调用，日志事件和大屏的 remove 变更随之保留
+  async remove({ id }) {
+    if (!this.participants.has(id)) {
+      return { status: 'not_found' };
+    }
+
+    await this.record({ type: 'remove', id: id });
+
+    const existing = this.participants.get(id);
+    if (!existing) {
+      return { status: 'not_found' };
+    }
+
+    this.participants.delete(id);
+    this.personIndex.remove(existing);
+    const rank = timeIndex('remove', () => this.leaderboard.remove(id));
+    this.lastUpdateTime = Date.now();
+    this.publishDelta([{ op: 'remove', rank: rank, id: id }]);
+
+    return { status: 'removed', participant: existing };
+  }
+
+  async clear() {
+    await this.record({ type: 'clear' });
+
+    const count = this.participants.size;
+    this.reset();
+    // 清空落盘期间追加的新增已占用编号，新编号从它们之后开始
+    this.nextId = this.reservedIds.size > 0 ? Math.max(...this.reservedIds) + 1 : 1;
+    this.publishReset('reset');
+
+    return { status: 'cleared', count: count };
+  }
+
+  // 内存告急时的紧急清理：与 clear 一样先写入日志，日志中的状态、判重索引和编号一并清空，
+  // 之后的提交与重启后恢复出的数据一致；返回清理的条数
+  async releaseMemory() {
+    const { count } = await this.clear();
+    return count;
+  }
+
+  snapshot() {
+    return {
+      version: this.version,
+      data: this.leaderboard.toArray(),
+      total: this.participants.size,
+      lastUpdateTime: this.lastUpdateTime
+    };
+  }
+
+  getStats() {
+    return {
+      total: this.participants.size,
+      version: this.version,
+      rateLimitEntries: this.submitCache.size,
+      journal: this.journal ? this.journal.getMetrics() : null
+    };
+  }
+
+  close() {
+    return this.journal ? this.journal.close() : Promise.resolve();
+  }
+
+  // 先写入有序索引：排序键无效时在修改其他结构之前抛出
+  index(participant) {
+    const rank = timeIndex('insert', () => this.leaderboard.insert(participant));
+    this.participants.set(participant.id, participant);
+    this.personIndex.add(participant);
+    return rank;
+  }
+
+  reset() {
+    this.participants.clear();
+    this.personIndex.clear();
+    this.leaderboard.clear();
+    this.lastUpdateTime = Date.now();
+  }
+
+  record(event) {
+    return this.journal ? this.journal.append(event) : Promise.resolve();
+  }
+
+  publishDelta(ops) {
+    this.version++;
+    this.publish({ type: 'delta', version: this.version, ops: ops });
+  }
+
+  publishReset(reason) {
+    this.version++;
+    this.publish({
+      type: 'reset',
+      version: this.version,
+      reason: reason,
+      data: this.leaderboard.toArray()
+    });
+  }
+}
+
+class LeaderboardReplica {
+  constructor() {
+    this.participants = new Map(); // participantId -> participant data
+    this.leaderboard = new LeaderboardIndex();
+    this.lastUpdateTime = 0;
+    this.version = -1; // 未加载快照
+    this.buffered = [];
+  }
+
+  get ready() {
+    return this.version >= 0;
+  }
+
+  // 加载快照，并按顺序应用加载期间收到的更新版本变更
+  load(snapshot) {
+    this.resetTo(snapshot.data);
+    this.version = snapshot.version;
+    this.lastUpdateTime = snapshot.lastUpdateTime;
+
+    const pending = this.buffered
+      .filter(message => message.version > this.version)
+      .sort((a, b) => a.version - b.version);
+    this.buffered = [];
+
+    for (const message of pending) {
+      if (message.version !== this.version + 1) break;
+      this.apply(message);
+    }
+  }
+
+  // 返回 applied | buffered | stale | gap，gap 时需要重新加载快照
+  receive(message) {
+    if (!this.ready) {
+      this.buffered.push(message);
+      return 'buffered';
+    }
+    if (message.version <= this.version) {
+      return 'stale';
+    }
+    if (message.version !== this.version + 1) {
+      this.version = -1;
+      this.buffered = [message];
+      return 'gap';
+    }
+
+    this.apply(message);
+    return 'applied';
+  }
+
+  apply(message) {
+    if (message.type === 'reset') {
+      this.resetTo(message.data);
+    } else {
+      message.ops.forEach(op => this.applyOp(op));
+    }
+    this.version = message.version;
+    this.lastUpdateTime = Date.now();
+  }
+
+  applyOp(op) {
+    switch (op.op) {
+      case 'insert':
+        this.participants.set(op.participant.id, op.participant);
+        timeIndex('insert', () => this.leaderboard.insert(op.participant));
+        break;
+      case 'update':
+      case 'move': {
+        const existing = this.participants.get(op.participant.id);
+        if (existing) {
+          Object.assign(existing, op.participant);
+          timeIndex('update', () => this.leaderboard.update(existing));
+        }
+        break;
+      }
+      case 'remove':
+        this.participants.delete(op.id);
+        timeIndex('remove', () => this.leaderboard.remove(op.id));
+        break;
+    }
+  }
+
+  resetTo(data) {
+    timeIndex('rebuild', () => {
+      this.participants.clear();
+      this.leaderboard.clear();
+      data.forEach(participant => {
+        this.participants.set(participant.id, participant);
+        this.leaderboard.insert(participant);
+      });
+    });
+  }
+}
+
+module.exports = {
+  ParticipantStore,
+  LeaderboardReplica
+};
@@ -3,22 +3,26 @@ class AdminPanel {
         this.participants = [];
         this.stats = {};
         this.logs = [];
-        this.refreshInterval = null;
+        this.statsSocket = null;
+        this.statsReconnectDelay = 3000;
+        this.statsReconnectTimer = null;
+        this.participantsVersion = null; // 参与者列表对应的数据版本，与推送的 stats.version 比较判断是否过期
+        this.participantsRequest = null; // 进行中的列表请求，重复触发时复用
 
         this.init();
     }
 
     init() {
         this.bindEvents();
-        this.startAutoRefresh();
+        this.connectStats();
         this.loadInitialData();
         this.startClock();
     }
 
     bindEvents() {
-        // 页面关闭时清理定时器
+        // 页面关闭时断开统计推送
         window.addEventListener('beforeunload', () => {
-            this.stopAutoRefresh();
+            this.disconnectStats();
         });
 
         // 事件委托处理按钮点击
@@ -43,6 +47,10 @@ class AdminPanel {
                     e.preventDefault();
                     this.showParticipants();
                     break;
+                case 'refresh-participants':
+                    e.preventDefault();
+                    this.loadParticipants();
+                    break;
                 case 'hide-participants':
                     e.preventDefault();
                     this.hideParticipants();
@@ -81,19 +89,75 @@ class AdminPanel {
         });
     }
 
-    startAutoRefresh() {
-        this.refreshInterval = setInterval(() => {
-            this.loadStats();
-        }, 30000); // 每30秒刷新一次
+    // 统计数据由服务端通过 /ws?channel=stats 定时推送，不再轮询 /api/stats
+    connectStats() {
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const wsUrl = `${protocol}//${window.location.host}/ws?channel=stats`;
+
+        try {
+            this.statsSocket = new WebSocket(wsUrl);
+        } catch (error) {
+            console.error('统计推送连接失败:', error);
+            this.scheduleStatsReconnect();
+            return;
+        }
+
+        this.statsSocket.onopen = () => {
+            this.statsReconnectDelay = 3000;
+            this.addLog('info', '统计推送已连接');
+        };
+
+        this.statsSocket.onmessage = (event) => {
+            try {
+                const message = JSON.parse(event.data);
+                if (message.type === 'stats') {
+                    this.handleStats(message.data);
+                }
+            } catch (error) {
+                console.error('解析统计推送失败:', error);
+            }
+        };
+
+        this.statsSocket.onclose = () => {
+            this.statsSocket = null;
+            this.updateServerStatus(false);
+            this.addLog('warn', '统计推送连接断开');
+            this.scheduleStatsReconnect();
+        };
     }
 
-    stopAutoRefresh() {
-        if (this.refreshInterval) {
-            clearInterval(this.refreshInterval);
-            this.refreshInterval = null;
+    scheduleStatsReconnect() {
+        if (this.statsReconnectTimer) return;
+
+        const delay = this.statsReconnectDelay;
+        this.statsReconnectDelay = Math.min(delay * 2, 30000);
+        this.statsReconnectTimer = setTimeout(() => {
+            this.statsReconnectTimer = null;
+            this.connectStats();
+        }, delay);
+    }
+
+    disconnectStats() {
+        if (this.statsReconnectTimer) {
+            clearTimeout(this.statsReconnectTimer);
+            this.statsReconnectTimer = null;
+        }
+        if (this.statsSocket) {
+            this.statsSocket.onclose = null;
+            this.statsSocket.close();
+            this.statsSocket = null;
         }
     }
 
+    handleStats(stats) {
+        this.stats = stats;
+        this.updateStatsDisplay();
+        this.updateServerStatus(true);
+
+        // 推送只更新统计数字；完整列表较大，数据变化时只提示，由管理员手动刷新
+        this.updateParticipantsStale();
+    }
+
     async loadInitialData() {
         await Promise.all([
             this.loadStats(),
@@ -122,14 +186,25 @@ class AdminPanel {
         }
     }
 
-    async loadParticipants() {
+    loadParticipants() {
+        if (!this.participantsRequest) {
+            this.participantsRequest = this.fetchParticipants().finally(() => {
+                this.participantsRequest = null;
+            });
+        }
+        return this.participantsRequest;
+    }
+
+    async fetchParticipants() {
         try {
             const response = await fetch('/api/participants');
             const result = await response.json();
 
             if (result.success) {
                 this.participants = result.data.participants || [];
+                this.participantsVersion = result.data.version ?? this.stats.version;
                 this.updateParticipantsTable();
+                this.updateParticipantsStale();
             } else {
                 throw new Error(result.message || '获取参与者列表失败');
             }
@@ -139,6 +214,23 @@ class AdminPanel {
         }
     }
 
+    isParticipantsStale() {
+        return this.participantsVersion === null || this.participantsVersion !== this.stats.version;
+    }
+
+    async ensureParticipants() {
+        if (this.isParticipantsStale()) {
+            await this.loadParticipants();
+        }
+    }
+
+    updateParticipantsStale() {
+        const hint = document.getElementById('participantsStale');
+        if (hint) {
+            hint.style.display = this.participantsVersion !== null && this.isParticipantsStale() ? 'inline-block' : 'none';
+        }
+    }
+
     updateStatsDisplay() {
         // 更新参与人数
         const participantCount = document.getElementById('participantCount');
@@ -293,7 +385,8 @@ class AdminPanel {
         }
     }
 
-    exportData() {
+    async exportData() {
+        await this.ensureParticipants();
         if (this.participants.length === 0) {
             this.showNotification('暂无数据可导出', 'warning');
             return;
@@ -336,6 +429,7 @@ class AdminPanel {
         if (section) {
             section.style.display = 'block';
             section.scrollIntoView({ behavior: 'smooth', block: 'start' });
+            this.ensureParticipants();
         }
     }
 
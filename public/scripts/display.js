@@ -1,3 +1,18 @@
+// 与 display.css 中的 --row-height 保持一致
+const ROW_HEIGHT = 56;
+const RANK_BADGES = ['👑', '🥈', '🥉'];
+
+// 复用格式化器，toLocaleString 每次调用都会新建格式化器
+const TARGET_FORMAT = new Intl.NumberFormat('zh-CN', {
+    minimumFractionDigits: 2,
+    maximumFractionDigits: 2
+});
+const TIME_FORMAT = new Intl.DateTimeFormat('zh-CN', {
+    hour: '2-digit',
+    minute: '2-digit',
+    second: '2-digit'
+});
+
 class DisplayManager {
     constructor() {
         this.ws = null;
@@ -7,12 +22,17 @@ class DisplayManager {
         this.heartbeatInterval = null;
         this.participants = [];
         this.currentHighlight = null;
+        this.renderer = null;
+        this.topThreeKeys = [];
+        this.seq = 0;
+        this.awaitingResync = false;
 
         this.init();
     }
 
     init() {
         this.hideLoading();
+        this.setupRenderer();
         this.setupWebSocket();
         this.startServerTime();
         this.bindEvents();
@@ -28,6 +48,23 @@ class DisplayManager {
         }
     }
 
+    setupRenderer() {
+        this.renderer = new LeaderboardRenderer({
+            container: document.querySelector('.list-container'),
+            tbody: document.getElementById('participantsTableBody'),
+            rowHeight: ROW_HEIGHT,
+            emptyMessage: '暂无参与者数据，等待用户提交...',
+            onRowClick: (id) => this.highlightRow(id),
+            columns: [
+                { render: (participant, rank) => RANK_BADGES[rank] || String(rank + 1) },
+                { render: (participant) => participant.name },
+                { render: (participant) => participant.organization },
+                { render: (participant) => this.formatTarget(participant.target), strong: true },
+                { render: (participant) => this.formatTime(participant.timestamp) }
+            ]
+        });
+    }
+
     setupWebSocket() {
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
         const wsUrl = `${protocol}//${window.location.host}/ws`;
@@ -86,8 +123,8 @@ class DisplayManager {
             case 'initial':
                 this.handleInitialData(data);
                 break;
-            case 'update':
-                this.handleDataUpdate(data);
+            case 'delta':
+                this.handleDelta(data);
                 break;
             default:
                 console.warn('未知消息类型:', data.type);
@@ -96,41 +133,90 @@ class DisplayManager {
 
     handleInitialData(data) {
         this.participants = data.data || [];
-        this.updateDisplay();
-        this.showNotification(`已加载 ${this.participants.length} 条参与者数据`, 'success');
+        this.seq = data.seq || 0;
+        this.awaitingResync = false;
+        this.updateDisplay({ animate: false });
+
+        if (data.reason === 'reset') {
+            this.showNotification('榜单已重置', 'info');
+        } else if (data.reason !== 'resync') {
+            this.showNotification(`已加载 ${this.participants.length} 条参与者数据`, 'success');
+        }
     }
 
-    handleDataUpdate(data) {
-        const oldParticipants = [...this.participants];
-        this.participants = data.data || [];
+    handleDelta(data) {
+        if (this.awaitingResync) return;
 
-        this.detectChanges(oldParticipants, this.participants);
-        this.updateDisplay();
-    }
+        if (data.seq !== this.seq + 1) {
+            console.warn(`消息序号不连续: 期望 ${this.seq + 1}，收到 ${data.seq}`);
+            this.requestResync();
+            return;
+        }
 
-    detectChanges(oldData, newData) {
-        // 检测新增
-        const newParticipants = newData.filter(item =>
-            !oldData.some(oldItem => oldItem.id === item.id)
-        );
+        const oldTop3 = this.participants.slice(0, 3).map(p => p.id).join(',');
 
-        newParticipants.forEach(participant => {
-            this.showNotification(`🎉 新参与者: ${participant.name} (${participant.organization})`, 'success');
-        });
+        for (const op of data.ops || []) {
+            if (!this.applyDelta(op)) {
+                console.warn('增量数据与本地榜单不一致:', op);
+                this.requestResync();
+                return;
+            }
+        }
+
+        this.seq = data.seq;
+        if (this.participants.length !== data.total) {
+            this.requestResync();
+            return;
+        }
 
-        // 检测排名变化
-        const oldTop3 = oldData.slice(0, 3);
-        const newTop3 = newData.slice(0, 3);
+        const newTop3 = this.participants.slice(0, 3).map(p => p.id).join(',');
+        const inserted = (data.ops || []).filter(op => op.op === 'insert').map(op => op.participant.id);
+        this.updateDisplay({ inserted: inserted });
 
-        if (JSON.stringify(oldTop3.map(p => p.id)) !== JSON.stringify(newTop3.map(p => p.id))) {
+        if (oldTop3 !== newTop3) {
             this.highlightTop3();
         }
     }
 
-    updateDisplay() {
+    applyDelta(op) {
+        const list = this.participants;
+
+        switch (op.op) {
+            case 'insert':
+                if (op.rank > list.length) return false;
+                list.splice(op.rank, 0, op.participant);
+                this.showNotification(`🎉 新参与者: ${op.participant.name} (${op.participant.organization})`, 'success');
+                return true;
+            case 'update':
+                if (list[op.rank]?.id !== op.participant.id) return false;
+                list[op.rank] = op.participant;
+                return true;
+            case 'move':
+                if (list[op.from]?.id !== op.participant.id) return false;
+                list.splice(op.from, 1);
+                list.splice(op.to, 0, op.participant);
+                return true;
+            case 'remove':
+                if (list[op.rank]?.id !== op.id) return false;
+                list.splice(op.rank, 1);
+                return true;
+            default:
+                return false;
+        }
+    }
+
+    requestResync() {
+        this.awaitingResync = true;
+
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.ws.send(JSON.stringify({ type: 'resync', seq: this.seq }));
+        }
+    }
+
+    updateDisplay(hints = {}) {
         this.updateStats();
         this.updateTopThree();
-        this.updateParticipantsTable();
+        this.updateParticipantsTable(hints);
         this.updateLastUpdateTime();
     }
 
@@ -147,6 +233,10 @@ class DisplayManager {
 
         positions.forEach((pos, index) => {
             const participant = top3[index];
+            const key = participant ? `${participant.id}:${participant.target}` : '';
+            if (this.topThreeKeys[index] === key) return;
+            this.topThreeKeys[index] = key;
+
             const nameEl = document.getElementById(names[index]);
             const orgEl = document.getElementById(orgs[index]);
             const targetEl = document.getElementById(targets[index]);
@@ -166,71 +256,27 @@ class DisplayManager {
         });
     }
 
-    updateParticipantsTable() {
-        const tbody = document.getElementById('participantsTableBody');
-
-        if (this.participants.length === 0) {
-            tbody.innerHTML = `
-                <tr class="empty-state">
-                    <td colspan="5" class="empty-message">
-                        暂无参与者数据，等待用户提交...
-                    </td>
-                </tr>
-            `;
-            return;
-        }
-
-        tbody.innerHTML = this.participants.map((participant, index) => `
-            <tr class="${index < 3 ? 'highlight' : ''}" data-id="${participant.id}">
-                <td>
-                    ${index === 0 ? '👑' : index === 1 ? '🥈' : index === 2 ? '🥉' : index + 1}
-                </td>
-                <td>${this.escapeHtml(participant.name)}</td>
-                <td>${this.escapeHtml(participant.organization)}</td>
-                <td><strong>${this.formatTarget(participant.target)}</strong></td>
-                <td>${this.formatTime(participant.timestamp)}</td>
-            </tr>
-        `).join('');
-
-        // 添加行点击事件
-        tbody.querySelectorAll('tr[data-id]').forEach(row => {
-            row.addEventListener('click', () => {
-                const id = parseInt(row.dataset.id);
-                this.highlightRow(id);
-            });
-        });
+    // 只修补变化的行，渲染在下一帧统一进行
+    updateParticipantsTable(hints) {
+        this.renderer.update(this.participants, hints);
     }
 
     highlightTop3() {
-        const rows = document.querySelectorAll('.participants-table tbody tr[data-id]');
-        rows.forEach((row, index) => {
-            if (index < 3) {
-                row.classList.add('highlight');
-                setTimeout(() => {
-                    row.classList.remove('highlight');
-                }, 3000);
-            }
-        });
+        this.renderer.flash(this.participants.slice(0, 3).map(p => p.id));
     }
 
     highlightRow(id) {
-        // 清除之前的高亮
-        document.querySelectorAll('.participants-table tbody tr').forEach(row => {
-            row.classList.remove('highlight');
-        });
-
-        // 高亮当前行
-        const targetRow = document.querySelector(`tr[data-id="${id}"]`);
-        if (targetRow) {
-            targetRow.classList.add('highlight');
-            targetRow.scrollIntoView({ behavior: 'smooth', block: 'center' });
-        }
+        this.renderer.select(id);
     }
 
+    // 使用 Web Animations API 重播入场动画，避免重置 style.animation 强制同步布局
     animateElement(element) {
-        element.style.animation = 'none';
-        element.offsetHeight; // 触发重绘
-        element.style.animation = 'slideIn 0.5s ease-out';
+        if (typeof element.animate === 'function') {
+            element.animate([
+                { opacity: 0, transform: 'translateX(-20px)' },
+                { opacity: 1, transform: 'translateX(0)' }
+            ], { duration: 500, easing: 'ease-out' });
+        }
     }
 
     updateLastUpdateTime() {
@@ -313,25 +359,11 @@ class DisplayManager {
     }
 
     formatTarget(target) {
-        return `¥${Number(target).toLocaleString('zh-CN', {
-            minimumFractionDigits: 2,
-            maximumFractionDigits: 2
-        })}`;
+        return `¥${TARGET_FORMAT.format(Number(target))}`;
     }
 
     formatTime(timestamp) {
-        const date = new Date(timestamp);
-        return date.toLocaleTimeString('zh-CN', {
-            hour: '2-digit',
-            minute: '2-digit',
-            second: '2-digit'
-        });
-    }
-
-    escapeHtml(text) {
-        const div = document.createElement('div');
-        div.textContent = text;
-        return div.innerHTML;
+        return TIME_FORMAT.format(new Date(timestamp));
     }
 
     bindEvents() {
@@ -350,6 +382,11 @@ class DisplayManager {
             }
         });
 
+        // 窗口尺寸变化时重新计算可视行数
+        window.addEventListener('resize', () => {
+            this.renderer.measure();
+        });
+
         window.addEventListener('offline', () => {
             this.showNotification('网络已断开', 'error');
             this.updateConnectionStatus('disconnected');
@@ -0,0 +1,375 @@
+// 大屏榜单渲染器：按参与者ID复用行元素，只修补名次或数值发生变化的单元格
+// - 虚拟滚动：只挂载可视区域及上下缓冲区内的行，其余高度由上下两个占位行撑开
+// - 名次变化使用 FLIP 动画：位移由名次差直接算出，不读取布局；
+//   反转（transform 回到旧位置）与播放（清除 transform）分两帧在 requestAnimationFrame 中批量写入
+// - 同一帧内的多次 update() 合并为一次渲染
+// 行高固定（与 display.css 中的 --row-height 一致），计算可视范围时无需测量DOM
+// 容器高度随内容增长（max-height），空榜单时只有一行高：优先用 ResizeObserver 跟踪容器高度，
+// 不支持时在第一次渲染出数据行后重新测量一次
+// 浏览器中作为全局类使用；Node 中可 require，供 bench/display.js 回放基准测试
+
+const ENTER_KEYFRAMES = [
+    { opacity: 0, transform: 'translateX(-20px)' },
+    { opacity: 1, transform: 'translateX(0)' }
+];
+
+const FLASH_KEYFRAMES = [
+    { backgroundColor: 'rgba(255, 215, 0, 0.3)' },
+    { backgroundColor: 'rgba(102, 126, 234, 0.1)' }
+];
+
+class LeaderboardRenderer {
+    constructor(options) {
+        this.document = options.document || document;
+        this.container = options.container; // 滚动容器
+        this.tbody = options.tbody;
+        this.columns = options.columns; // [{ render(participant, rank) => string, strong }]
+        this.rowHeight = options.rowHeight || 56;
+        this.overscan = options.overscan || 5;
+        this.highlightTop = options.highlightTop ?? 3;
+        this.moveDuration = options.moveDuration || 300;
+        this.maxAnimatedMoves = options.maxAnimatedMoves || 40; // 同时移动的行过多时直接跳到新位置
+        this.emptyMessage = options.emptyMessage || '';
+        this.onRowClick = options.onRowClick || null;
+        this.requestFrame = options.requestAnimationFrame || (callback => window.requestAnimationFrame(callback));
+        this.ResizeObserver = options.ResizeObserver !== undefined
+            ? options.ResizeObserver
+            : (typeof ResizeObserver === 'function' ? ResizeObserver : null);
+
+        this.list = [];
+        this.rows = new Map(); // 已挂载的行，按名次顺序: participantId -> row
+        this.pool = []; // 移出可视区域后回收的行元素
+        this.inserted = new Set(); // 本帧需要播放入场动画的新参与者
+        this.animate = true;
+        this.selectedId = null;
+        this.scrollTop = 0;
+        this.viewportHeight = 0;
+        this.measuredWithRows = false; // 是否已在有数据行时测量过容器高度
+        this.resizeObserver = null;
+        this.framePending = false;
+        this.playing = [];
+        this.playPending = false;
+        this.metrics = {
+            frames: 0,
+            mounts: 0,
+            unmounts: 0,
+            domMoves: 0,
+            cellWrites: 0,
+            animatedMoves: 0
+        };
+
+        this.topSpacer = this.createSpacer();
+        this.bottomSpacer = this.createSpacer();
+        this.emptyRow = this.createEmptyRow();
+        this.tbody.textContent = '';
+        this.tbody.appendChild(this.topSpacer.row);
+        this.tbody.appendChild(this.bottomSpacer.row);
+
+        this.bindEvents();
+        this.measure();
+        this.observeResize();
+    }
+
+    bindEvents() {
+        this.container.addEventListener('scroll', () => {
+            this.scrollTop = this.container.scrollTop;
+            this.schedule();
+        }, { passive: true });
+
+        // 行点击使用事件委托，行元素复用时无需重新绑定
+        this.tbody.addEventListener('click', (event) => {
+            const row = event.target.closest && event.target.closest('tr[data-id]');
+            if (row && this.onRowClick) {
+                this.onRowClick(parseInt(row.dataset.id, 10));
+            }
+        });
+    }
+
+    // 容器尺寸变化时调用（窗口缩放等），渲染过程中不读取布局
+    measure() {
+        this.measuredWithRows = this.rows.size > 0;
+        this.scrollTop = this.container.scrollTop || 0;
+        this.setViewportHeight(this.container.clientHeight);
+        this.schedule();
+    }
+
+    // 容器高度由 ResizeObserver 回调给出，不触发额外的布局计算
+    observeResize() {
+        if (!this.ResizeObserver) return;
+
+        this.resizeObserver = new this.ResizeObserver(entries => {
+            const entry = entries[entries.length - 1];
+            if (this.setViewportHeight(entry.contentRect.height)) {
+                this.schedule();
+            }
+        });
+        this.resizeObserver.observe(this.container);
+    }
+
+    setViewportHeight(height) {
+        const viewportHeight = height || this.rowHeight * 10;
+        if (viewportHeight === this.viewportHeight) return false;
+        this.viewportHeight = viewportHeight;
+        return true;
+    }
+
+    // list 为按名次排列的完整榜单；hints.inserted 为新增参与者ID，hints.animate=false 时不播放移动动画
+    update(list, hints = {}) {
+        this.list = list;
+        if (hints.inserted) {
+            hints.inserted.forEach(id => this.inserted.add(id));
+        }
+        if (hints.animate === false) {
+            this.animate = false;
+        }
+        this.schedule();
+    }
+
+    schedule() {
+        if (this.framePending) return;
+        this.framePending = true;
+        this.requestFrame(() => this.render());
+    }
+
+    render() {
+        this.framePending = false;
+        this.metrics.frames++;
+
+        const list = this.list;
+        const animate = this.animate;
+        const inserted = this.inserted;
+        this.animate = true;
+        this.inserted = new Set();
+
+        if (list.length === 0) {
+            this.renderEmpty();
+            return;
+        }
+        if (this.emptyRow.parentNode) {
+            this.tbody.removeChild(this.emptyRow);
+        }
+
+        const visibleCount = Math.ceil(this.viewportHeight / this.rowHeight) + this.overscan * 2;
+        const firstVisible = Math.floor(this.scrollTop / this.rowHeight);
+        const start = Math.max(0, Math.min(firstVisible - this.overscan, list.length - visibleCount));
+        const end = Math.min(list.length, start + visibleCount);
+
+        const mounted = new Map();
+        const moves = [];
+        for (let rank = start; rank < end; rank++) {
+            const participant = list[rank];
+            let row = this.rows.get(participant.id);
+            if (row) {
+                this.rows.delete(participant.id);
+                if (row.rank !== rank) {
+                    moves.push({ row: row, offset: (row.rank - rank) * this.rowHeight });
+                }
+            } else {
+                row = this.acquireRow();
+                row.entering = inserted.has(participant.id);
+            }
+            this.patchRow(row, participant, rank);
+            mounted.set(participant.id, row);
+        }
+
+        // 剩下的行已离开可视范围
+        this.rows.forEach(row => this.releaseRow(row));
+        this.rows = mounted;
+
+        // 按名次顺序排列行元素，已在正确位置的行不移动
+        let cursor = this.topSpacer.row.nextSibling;
+        mounted.forEach(row => {
+            if (row.el === cursor) {
+                cursor = cursor.nextSibling;
+            } else {
+                this.tbody.insertBefore(row.el, cursor);
+                this.metrics.domMoves++;
+            }
+            if (row.entering) {
+                row.entering = false;
+                if (typeof row.el.animate === 'function') {
+                    row.el.animate(ENTER_KEYFRAMES, { duration: 500, easing: 'ease-out' });
+                }
+            }
+        });
+
+        this.setSpacerHeight(this.topSpacer, start * this.rowHeight);
+        this.setSpacerHeight(this.bottomSpacer, (list.length - end) * this.rowHeight);
+
+        if (animate && moves.length > 0 && moves.length <= this.maxAnimatedMoves) {
+            this.invert(moves);
+        }
+
+        // 之前测量时容器里没有数据行，高度偏小；下一帧布局完成后按实际高度重新计算可视行数
+        if (!this.measuredWithRows && !this.resizeObserver) {
+            this.measuredWithRows = true;
+            this.requestFrame(() => this.measure());
+        }
+    }
+
+    // FLIP 第一步：行已在新位置，用 transform 放回旧位置，下一帧再播放
+    invert(moves) {
+        moves.forEach(({ row, offset }) => {
+            row.el.style.transition = 'none';
+            row.el.style.transform = `translateY(${offset}px)`;
+            this.playing.push(row);
+        });
+        this.metrics.animatedMoves += moves.length;
+
+        if (!this.playPending) {
+            this.playPending = true;
+            this.requestFrame(() => this.play());
+        }
+    }
+
+    play() {
+        this.playPending = false;
+        const rows = this.playing;
+        this.playing = [];
+
+        rows.forEach(row => {
+            if (row.id === null) return; // 已回收
+            row.el.style.transition = `transform ${this.moveDuration}ms ease`;
+            row.el.style.transform = '';
+        });
+    }
+
+    patchRow(row, participant, rank) {
+        if (row.participant !== participant || row.rank !== rank) {
+            this.columns.forEach((column, index) => {
+                const text = column.render(participant, rank);
+                if (row.texts[index] !== text) {
+                    row.texts[index] = text;
+                    row.cells[index].textContent = text;
+                    this.metrics.cellWrites++;
+                }
+            });
+            row.participant = participant;
+            row.rank = rank;
+        }
+
+        if (row.id !== participant.id) {
+            row.id = participant.id;
+            row.el.dataset.id = participant.id;
+        }
+
+        const className = rank < this.highlightTop || participant.id === this.selectedId ? 'highlight' : '';
+        if (row.className !== className) {
+            row.className = className;
+            row.el.className = className;
+        }
+    }
+
+    acquireRow() {
+        this.metrics.mounts++;
+        return this.pool.pop() || this.createRow();
+    }
+
+    releaseRow(row) {
+        this.metrics.unmounts++;
+        this.tbody.removeChild(row.el);
+        row.el.style.transition = '';
+        row.el.style.transform = '';
+        row.participant = null;
+        row.rank = -1;
+        row.id = null;
+        // 单元格内容保持不变，texts 仍与DOM一致，复用时可以继续比对
+        if (this.pool.length < 50) {
+            this.pool.push(row);
+        }
+    }
+
+    createRow() {
+        const el = this.document.createElement('tr');
+        const cells = this.columns.map(column => {
+            const td = this.document.createElement('td');
+            el.appendChild(td);
+            if (!column.strong) return td;
+
+            const strong = this.document.createElement('strong');
+            td.appendChild(strong);
+            return strong;
+        });
+
+        return {
+            el: el,
+            cells: cells,
+            texts: this.columns.map(() => null),
+            participant: null,
+            rank: -1,
+            id: null,
+            className: null,
+            entering: false
+        };
+    }
+
+    createSpacer() {
+        const row = this.document.createElement('tr');
+        const cell = this.document.createElement('td');
+        row.className = 'virtual-spacer';
+        cell.colSpan = this.columns.length;
+        row.appendChild(cell);
+        return { row: row, cell: cell, height: 0 };
+    }
+
+    setSpacerHeight(spacer, height) {
+        if (spacer.height !== height) {
+            spacer.height = height;
+            spacer.cell.style.height = `${height}px`;
+        }
+    }
+
+    createEmptyRow() {
+        const row = this.document.createElement('tr');
+        const cell = this.document.createElement('td');
+        row.className = 'empty-state';
+        cell.className = 'empty-message';
+        cell.colSpan = this.columns.length;
+        cell.textContent = this.emptyMessage;
+        row.appendChild(cell);
+        return row;
+    }
+
+    renderEmpty() {
+        this.rows.forEach(row => this.releaseRow(row));
+        this.rows = new Map();
+        this.setSpacerHeight(this.topSpacer, 0);
+        this.setSpacerHeight(this.bottomSpacer, 0);
+        if (!this.emptyRow.parentNode) {
+            this.tbody.insertBefore(this.emptyRow, this.bottomSpacer.row);
+        }
+    }
+
+    // 选中某位参与者：高亮并滚动到可视区域中央
+    select(id) {
+        this.selectedId = id;
+        const rank = this.list.findIndex(participant => participant.id === id);
+        if (rank >= 0) {
+            const top = Math.max(0, rank * this.rowHeight - (this.viewportHeight - this.rowHeight) / 2);
+            this.container.scrollTo({ top: top, behavior: 'smooth' });
+        }
+        this.schedule();
+    }
+
+    // 对已挂载的行播放一次高亮闪烁
+    flash(ids) {
+        ids.forEach(id => {
+            const row = this.rows.get(id);
+            if (row && typeof row.el.animate === 'function') {
+                row.el.animate(FLASH_KEYFRAMES, { duration: 1000, easing: 'ease-out' });
+            }
+        });
+    }
+
+    getMetrics() {
+        return {
+            ...this.metrics,
+            mountedRows: this.rows.size,
+            pooledRows: this.pool.length
+        };
+    }
+}
+
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { LeaderboardRenderer };
+}
@@ -0,0 +1,196 @@
+// 广播调度器测试（使用模拟连接，手动触发刷新）
+// - 合并：窗口内多次 enqueue/reset 只推送一条消息、只占用一个序号，reset 取代已排队的增量
+// - 延后快照：有未推送的变更时新连接的快照延后到刷新时发送，之后的增量序号连续
+// - 积压：发送缓冲超限的连接被跳过，缓冲排空后补发 resync 快照
+// 用法: node test/broadcaster.test.js
+
+const assert = require('assert');
+const WebSocket = require('ws');
+const { BroadcastScheduler } = require('../lib/broadcaster');
+
+const MAX_BUFFERED_BYTES = 1000;
+
+function createSocket() {
+  return {
+    readyState: WebSocket.OPEN,
+    bufferedAmount: 0,
+    messages: [],
+    send(buffer) {
+      this.messages.push(JSON.parse(buffer.toString()));
+    },
+    // 取出并清空已收到的消息
+    take() {
+      const messages = this.messages;
+      this.messages = [];
+      return messages;
+    }
+  };
+}
+
+function createScheduler(sockets) {
+  const leaderboard = [];
+  const scheduler = new BroadcastScheduler({
+    clients: new Set(sockets),
+    windowMs: 1000,
+    maxBufferedBytes: MAX_BUFFERED_BYTES,
+    getTotal: () => leaderboard.length,
+    getSnapshot: () => leaderboard.slice(),
+    onError: error => {
+      throw error;
+    }
+  });
+  return { scheduler, leaderboard };
+}
+
+// 立即执行本窗口的刷新，不等待定时器
+function flushNow(scheduler) {
+  scheduler.stop();
+  scheduler.flush();
+}
+
+function insert(leaderboard, id) {
+  const participant = { id: id, name: `参与者${id}`, target: id };
+  leaderboard.push(participant);
+  return { op: 'insert', rank: leaderboard.length - 1, participant: participant };
+}
+
+function testCoalescing() {
+  const ws = createSocket();
+  const { scheduler, leaderboard } = createScheduler([ws]);
+
+  scheduler.enqueue([insert(leaderboard, 1)]);
+  scheduler.enqueue([insert(leaderboard, 2), insert(leaderboard, 3)]);
+  assert.deepStrictEqual(ws.take(), [], '窗口结束前不应发送');
+  flushNow(scheduler);
+
+  const [delta, ...rest] = ws.take();
+  assert.deepStrictEqual(rest, []);
+  assert.strictEqual(delta.type, 'delta');
+  assert.strictEqual(delta.seq, 1);
+  assert.deepStrictEqual(delta.ops.map(op => op.participant.id), [1, 2, 3]);
+  assert.strictEqual(delta.total, 3);
+
+  // reset 取代窗口内已排队和之后追加的增量，仍只占用一个序号
+  scheduler.enqueue([insert(leaderboard, 4)]);
+  leaderboard.length = 0;
+  scheduler.reset('reset');
+  scheduler.enqueue([insert(leaderboard, 5)]);
+  flushNow(scheduler);
+
+  const [snapshot, ...others] = ws.take();
+  assert.deepStrictEqual(others, []);
+  assert.strictEqual(snapshot.type, 'initial');
+  assert.strictEqual(snapshot.reason, 'reset');
+  assert.strictEqual(snapshot.seq, 2);
+  assert.deepStrictEqual(snapshot.data.map(p => p.id), [5]);
+
+  // 没有变更时刷新不发送、不推进序号
+  flushNow(scheduler);
+  assert.deepStrictEqual(ws.take(), []);
+
+  const metrics = scheduler.getMetrics();
+  assert.strictEqual(metrics.seq, 2);
+  assert.strictEqual(metrics.writes, 5);
+  assert.strictEqual(metrics.coalescedWrites, 3);
+  assert.strictEqual(metrics.opsSent, 3);
+}
+
+function testDeferredSnapshot() {
+  const existing = createSocket();
+  const { scheduler, leaderboard } = createScheduler([existing]);
+
+  // 没有待推送的变更时立即发送当前序号的快照
+  const early = createSocket();
+  scheduler.clients.add(early);
+  scheduler.sendSnapshot(early, 'connect');
+  assert.deepStrictEqual(early.take().map(m => [m.type, m.reason, m.seq]), [['initial', 'connect', 0]]);
+
+  // 有待推送的变更时延后：快照已包含这批变更，客户端不会再收到同一序号的增量
+  scheduler.enqueue([insert(leaderboard, 1)]);
+  const late = createSocket();
+  scheduler.clients.add(late);
+  scheduler.sendSnapshot(late, 'connect');
+  assert.deepStrictEqual(late.take(), []);
+  flushNow(scheduler);
+
+  const [snapshot, ...rest] = late.take();
+  assert.deepStrictEqual(rest, []);
+  assert.strictEqual(snapshot.type, 'initial');
+  assert.strictEqual(snapshot.seq, 1);
+  assert.deepStrictEqual(snapshot.data.map(p => p.id), [1]);
+  assert.deepStrictEqual(existing.take().map(m => [m.type, m.seq]), [['delta', 1]]);
+  assert.deepStrictEqual(early.take().map(m => [m.type, m.seq]), [['delta', 1]]);
+
+  // 之后的增量对所有连接序号连续
+  scheduler.enqueue([insert(leaderboard, 2)]);
+  flushNow(scheduler);
+  [existing, early, late].forEach(ws => {
+    assert.deepStrictEqual(ws.take().map(m => [m.type, m.seq]), [['delta', 2]]);
+  });
+}
+
+function testBackpressure() {
+  const fast = createSocket();
+  const slow = createSocket();
+  const closed = createSocket();
+  const { scheduler, leaderboard } = createScheduler([fast, slow, closed]);
+
+  slow.bufferedAmount = MAX_BUFFERED_BYTES + 1;
+  closed.bufferedAmount = MAX_BUFFERED_BYTES + 1;
+  scheduler.enqueue([insert(leaderboard, 1)]);
+  flushNow(scheduler);
+
+  assert.deepStrictEqual(fast.take().map(m => [m.type, m.seq]), [['delta', 1]]);
+  assert.deepStrictEqual(slow.take(), []);
+  assert.strictEqual(scheduler.getMetrics().skippedSockets, 2);
+  assert.strictEqual(scheduler.getMetrics().pendingResync, 2);
+  assert.ok(scheduler.timer, '积压的连接应在下个窗口重试');
+
+  // 仍然积压：继续等待，不重复计数；已关闭的连接不再重试
+  closed.readyState = WebSocket.CLOSED;
+  scheduler.enqueue([insert(leaderboard, 2)]);
+  flushNow(scheduler);
+  assert.deepStrictEqual(fast.take().map(m => [m.type, m.seq]), [['delta', 2]]);
+  assert.deepStrictEqual(slow.take(), []);
+  assert.strictEqual(scheduler.getMetrics().skippedSockets, 2);
+  assert.strictEqual(scheduler.getMetrics().pendingResync, 1);
+
+  // 缓冲排空后补发 resync 快照而不是中间的增量
+  slow.bufferedAmount = 0;
+  scheduler.enqueue([insert(leaderboard, 3)]);
+  flushNow(scheduler);
+  assert.deepStrictEqual(fast.take().map(m => [m.type, m.seq]), [['delta', 3]]);
+  const [snapshot, ...rest] = slow.take();
+  assert.deepStrictEqual(rest, []);
+  assert.strictEqual(snapshot.type, 'initial');
+  assert.strictEqual(snapshot.reason, 'resync');
+  assert.strictEqual(snapshot.seq, 3);
+  assert.deepStrictEqual(snapshot.data.map(p => p.id), [1, 2, 3]);
+  assert.strictEqual(scheduler.getMetrics().pendingResync, 0);
+  assert.strictEqual(scheduler.timer, null);
+
+  // 之后恢复正常接收增量
+  scheduler.enqueue([insert(leaderboard, 4)]);
+  flushNow(scheduler);
+  assert.deepStrictEqual(slow.take().map(m => [m.type, m.seq]), [['delta', 4]]);
+  assert.deepStrictEqual(closed.take(), []);
+}
+
+const tests = [
+  ['合并窗口内的变更', testCoalescing],
+  ['有待推送变更时延后快照', testDeferredSnapshot],
+  ['跳过积压连接并补发快照', testBackpressure]
+];
+
+let failed = 0;
+tests.forEach(([name, fn]) => {
+  try {
+    fn();
+    console.log(`✅ ${name}`);
+  } catch (error) {
+    failed++;
+    console.log(`❌ ${name}: ${error.message}`);
+  }
+});
+
+process.exit(failed === 0 ? 0 : 1);
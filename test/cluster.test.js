@@ -0,0 +1,172 @@
+// 集群模式收敛测试（IPC发布订阅 + 主进程RPC + 工作进程榜单副本）
+// 主进程持有 ParticipantStore，fork 多个工作进程；各工作进程经 OwnerClient 并发发送随机的
+// 提交、覆盖、删除、清空命令，副本按版本号应用主进程经 IpcPubSub 广播的变更。
+// 其中一个工作进程会故意丢弃部分消息，验证发现缺号后重新拉取快照的路径。
+// 全部完成后主进程经 collectFromWorkers 收集各副本的状态，榜单和版本号都必须与主进程一致。
+// 用法: node test/cluster.test.js [工作进程数] [每个进程的操作次数]
+
+const assert = require('assert');
+const cluster = require('cluster');
+const { createPubSub } = require('../lib/pubsub');
+const { isPrimary, OwnerClient, serveOwner, collectFromWorkers, serveWorker } = require('../lib/cluster');
+const { ParticipantStore, LeaderboardReplica } = require('../lib/store');
+
+const WORKERS = parseInt(process.argv[2], 10) || 3;
+const OPERATIONS = parseInt(process.argv[3], 10) || 300;
+const CONCURRENCY = 5;
+const TOPIC = 'leaderboard';
+const TEST_CHANNEL = 'meeting:test';
+const TIMEOUT_MS = 30000;
+
+const ORGANIZATIONS = ['华夏银行', '北京分行', '上海分行'];
+
+function summarize(leaderboard) {
+  return leaderboard.toArray().map(p => `${p.id}:${p.organization}/${p.name}:${p.target}:${p.timestamp}`);
+}
+
+async function runWorker() {
+  const pubsub = createPubSub('ipc');
+  const replica = new LeaderboardReplica();
+  const owner = new OwnerClient();
+  const dropMessages = cluster.worker.id === 1;
+  let received = 0;
+  let resyncs = 0;
+  let loading = null;
+
+  function refresh() {
+    if (!loading) {
+      loading = owner.request({ type: 'snapshot' }).then(snapshot => {
+        replica.load(snapshot);
+        loading = null;
+      });
+    }
+    return loading;
+  }
+
+  pubsub.subscribe(TOPIC, message => {
+    received++;
+    // 模拟丢失消息：之后的消息会出现缺号
+    if (dropMessages && received % 97 === 0) return;
+    if (replica.receive(message) === 'gap') {
+      resyncs++;
+      refresh();
+    }
+  });
+
+  await refresh();
+
+  const pick = list => list[Math.floor(Math.random() * list.length)];
+  const randomId = () => pick(Array.from(replica.participants.keys())) || 1;
+  let issued = 0;
+
+  async function loop() {
+    while (issued < OPERATIONS) {
+      issued++;
+      const roll = Math.random();
+      if (roll < 0.55) {
+        await owner.request({
+          type: 'submit',
+          ip: `worker-${cluster.worker.id}`,
+          organization: pick(ORGANIZATIONS),
+          name: `参与者${Math.floor(Math.random() * 60)}`,
+          target: Math.floor(Math.random() * 1000) / 10 + 0.1
+        });
+      } else if (roll < 0.8) {
+        await owner.request({ type: 'confirm', id: randomId(), target: Math.floor(Math.random() * 1000) / 10 + 0.1 });
+      } else if (roll < 0.99 || issued > OPERATIONS * 0.8) {
+        // 最后阶段不再清空，结束时榜单上留有数据可供比对
+        await owner.request({ type: 'remove', id: randomId() });
+      } else {
+        await owner.request({ type: 'clear' });
+      }
+    }
+  }
+  await Promise.all(Array.from({ length: CONCURRENCY }, loop));
+
+  // 可能还在重新拉取快照，等副本追上主进程的版本后再上报；
+  // 丢弃的恰好是最后一条消息时不会再出现缺号，直接拉取快照
+  serveWorker(command => new Promise(resolve => {
+    const report = () => {
+      if (loading || replica.version < command.version) {
+        if (!loading) refresh();
+        setTimeout(report, 10);
+        return;
+      }
+      resolve({
+        version: replica.version,
+        leaderboard: summarize(replica.leaderboard),
+        resyncs: resyncs
+      });
+    };
+    report();
+  }), () => {});
+  process.send({ channel: TEST_CHANNEL, type: 'done' });
+}
+
+function runPrimary() {
+  const pubsub = createPubSub('ipc');
+  const store = new ParticipantStore({
+    maxParticipants: 120,
+    rateLimitMs: 0,
+    publish: message => pubsub.publish(TOPIC, message)
+  });
+  serveOwner(command => store.execute(command), () => {});
+
+  const timer = setTimeout(() => {
+    console.log('❌ 集群副本收敛: 超时');
+    process.exit(1);
+  }, TIMEOUT_MS);
+
+  let done = 0;
+  let finished = false;
+  cluster.on('message', (worker, message) => {
+    if (!message || message.channel !== TEST_CHANNEL || message.type !== 'done') return;
+
+    if (++done === WORKERS) {
+      // 所有命令都已执行完毕，主进程状态不再变化
+      collectFromWorkers({ type: 'report', version: store.version }, TIMEOUT_MS).then(finish);
+    }
+  });
+
+  cluster.on('exit', (worker, code) => {
+    if (code !== 0 && !finished) {
+      console.log(`❌ 集群副本收敛: 工作进程 ${worker.id} 异常退出（代码: ${code}）`);
+      process.exit(1);
+    }
+  });
+
+  function finish({ results, missing }) {
+    clearTimeout(timer);
+    finished = true;
+    let failed = false;
+    try {
+      assert.deepStrictEqual(missing, [], '部分工作进程未上报状态');
+      const states = results.map(({ workerId, result }) => ({ id: workerId, ...result }));
+      const expected = summarize(store.leaderboard);
+      assert.ok(store.version > WORKERS * OPERATIONS * 0.5, '执行的写操作过少');
+      states.forEach(state => {
+        assert.strictEqual(state.version, store.version, `工作进程 ${state.id} 版本号不一致`);
+        assert.deepStrictEqual(state.leaderboard, expected, `工作进程 ${state.id} 榜单不一致`);
+      });
+      assert.ok(states.find(state => state.id === 1).resyncs > 0, '未触发缺号重新同步');
+      console.log(`✅ 集群副本收敛（${WORKERS}个工作进程，共${WORKERS * OPERATIONS}次操作，版本号${store.version}，参与者${store.participants.size}人）`);
+    } catch (error) {
+      failed = true;
+      console.log(`❌ 集群副本收敛: ${error.message}`);
+    }
+    cluster.disconnect(() => process.exit(failed ? 1 : 0));
+  }
+
+  for (let i = 0; i < WORKERS; i++) {
+    cluster.fork();
+  }
+}
+
+if (isPrimary) {
+  runPrimary();
+} else {
+  runWorker().catch(error => {
+    console.error(error);
+    process.exit(1);
+  });
+}
@@ -0,0 +1,36 @@
+// 测试和基准测试共用的工具函数
+
+// 固定种子的伪随机数（mulberry32），保证失败可复现、每次生成的数据相同
+function createRandom(seed) {
+  return () => {
+    seed |= 0;
+    seed = (seed + 0x6D2B79F5) | 0;
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// 解析 --name=value / --flag 形式的命令行参数
+function parseArgs(argv) {
+  const args = {};
+  argv.forEach(arg => {
+    const match = /^--([^=]+)(?:=(.*))?$/.exec(arg);
+    if (match) {
+      args[match[1]] = match[2] === undefined ? true : match[2];
+    }
+  });
+  return args;
+}
+
+// sorted 须已按升序排列，p 取 0~1
+function percentile(sorted, p) {
+  if (sorted.length === 0) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+module.exports = {
+  createRandom,
+  parseArgs,
+  percentile
+};
@@ -0,0 +1,243 @@
+// 持久化日志测试
+// - 重放：未正常关闭（无快照）时从日志恢复
+// - 崩溃时最后一行只写了一半：截断到最后一个完整行，之后可继续写入
+// - 压缩：达到阈值后写快照并截断日志，快照 + 日志尾部恢复出相同状态
+// - 先写日志：落盘失败时内存、榜单和发布的变更都不包含这次写入，日志中也没有残留
+// 用法: node test/journal.test.js
+
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { EventJournal } = require('../lib/journal');
+const { ParticipantStore } = require('../lib/store');
+
+const tempDirs = [];
+
+function createTempDir() {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'meeting-journal-test-'));
+  tempDirs.push(dir);
+  return dir;
+}
+
+function openJournal(dir, options = {}) {
+  const errors = [];
+  const journal = new EventJournal({ dir: dir, onError: error => errors.push(error), ...options });
+  const recovered = journal.load();
+  return { journal, recovered, errors };
+}
+
+// 模拟进程崩溃：不写快照，直接关闭文件
+function crash(journal) {
+  fs.closeSync(journal.fd);
+  journal.fd = null;
+  journal.closed = true;
+}
+
+function byId(participants) {
+  return participants.slice().sort((a, b) => a.id - b.id);
+}
+
+function participant(id, target) {
+  return { id: id, organization: '北京分行', name: `参与者${id}`, target: target, timestamp: 1700000000000 + id };
+}
+
+async function testReplay() {
+  const dir = createTempDir();
+  const { journal } = openJournal(dir);
+
+  await Promise.all([
+    journal.append({ type: 'create', participant: participant(1, 10) }),
+    journal.append({ type: 'create', participant: participant(2, 20) }),
+    journal.append({ type: 'create', participant: participant(3, 30) })
+  ]);
+  await journal.append({ type: 'update', id: 2, target: 25, timestamp: 1700000009999 });
+  await journal.append({ type: 'remove', id: 1 });
+  await journal.append({ type: 'update', id: 1, target: 99, timestamp: 1700000009999 }); // 已删除，重放时忽略
+  crash(journal);
+
+  assert.strictEqual(fs.existsSync(path.join(dir, 'snapshot.json')), false);
+  const { recovered, errors } = openJournal(dir);
+  assert.deepStrictEqual(errors, []);
+  assert.strictEqual(recovered.nextId, 4);
+  assert.deepStrictEqual(byId(recovered.participants), [
+    { ...participant(2, 25), timestamp: 1700000009999 },
+    participant(3, 30)
+  ]);
+
+  // 清空后编号从1开始
+  const second = openJournal(dir).journal;
+  await second.append({ type: 'clear' });
+  await second.append({ type: 'create', participant: participant(1, 5) });
+  crash(second);
+  const afterClear = openJournal(dir).recovered;
+  assert.deepStrictEqual(afterClear.participants, [participant(1, 5)]);
+  assert.strictEqual(afterClear.nextId, 2);
+}
+
+async function testTornLastLine() {
+  const dir = createTempDir();
+  const { journal } = openJournal(dir);
+  await journal.append({ type: 'create', participant: participant(1, 10) });
+  await journal.append({ type: 'create', participant: participant(2, 20) });
+  crash(journal);
+
+  const journalPath = path.join(dir, 'journal.log');
+  const complete = fs.readFileSync(journalPath, 'utf8');
+  fs.appendFileSync(journalPath, '{"type":"create","participant":{"id":3,"organiz');
+
+  const reopened = openJournal(dir);
+  assert.deepStrictEqual(reopened.errors, []);
+  assert.deepStrictEqual(byId(reopened.recovered.participants), [participant(1, 10), participant(2, 20)]);
+  assert.strictEqual(fs.readFileSync(journalPath, 'utf8'), complete);
+
+  // 截断后继续追加，新行不会接在半行后面
+  await reopened.journal.append({ type: 'create', participant: participant(3, 30) });
+  crash(reopened.journal);
+  const { recovered, errors } = openJournal(dir);
+  assert.deepStrictEqual(errors, []);
+  assert.strictEqual(recovered.participants.length, 3);
+}
+
+async function testCompaction() {
+  const dir = createTempDir();
+  const { journal } = openJournal(dir, { snapshotEvery: 5 });
+  const expected = new Map();
+
+  for (let id = 1; id <= 12; id++) {
+    const created = participant(id, id * 10);
+    expected.set(id, created);
+    await journal.append({ type: 'create', participant: created });
+  }
+  await journal.append({ type: 'remove', id: 4 });
+  expected.delete(4);
+
+  assert.ok(journal.getMetrics().snapshots >= 2, '未按阈值生成快照');
+  const snapshot = JSON.parse(fs.readFileSync(path.join(dir, 'snapshot.json'), 'utf8'));
+  const tail = fs.readFileSync(path.join(dir, 'journal.log'), 'utf8').split('\n').filter(Boolean);
+  assert.ok(tail.length < 5, `日志未截断，剩余${tail.length}行`);
+  assert.ok(snapshot.participants.length + tail.length <= 13);
+  crash(journal);
+
+  const { recovered } = openJournal(dir);
+  assert.deepStrictEqual(byId(recovered.participants), Array.from(expected.values()));
+  assert.strictEqual(recovered.nextId, 13);
+
+  // 正常关闭时写最终快照，日志为空
+  const reopened = openJournal(dir, { snapshotEvery: 5 }).journal;
+  await reopened.append({ type: 'update', id: 5, target: 1, timestamp: 1 });
+  await reopened.close();
+  assert.strictEqual(fs.readFileSync(path.join(dir, 'journal.log'), 'utf8'), '');
+  const final = openJournal(dir).recovered;
+  assert.strictEqual(final.participants.find(p => p.id === 5).target, 1);
+}
+
+// 让接下来的 count 次 fsync 失败
+function failFsync(count) {
+  const original = fs.fsync;
+  fs.fsync = (fd, callback) => {
+    if (count > 0) {
+      count--;
+      process.nextTick(() => callback(Object.assign(new Error('模拟磁盘错误'), { code: 'EIO' })));
+      return;
+    }
+    original(fd, callback);
+  };
+  return () => {
+    fs.fsync = original;
+  };
+}
+
+function createStore(dir, published) {
+  const store = new ParticipantStore({
+    maxParticipants: 100,
+    rateLimitMs: 0,
+    journal: new EventJournal({ dir: dir, onError: () => {} }),
+    publish: message => published.push(message)
+  });
+  store.load();
+  return { store };
+}
+
+async function testWriteAhead() {
+  const dir = createTempDir();
+  const published = [];
+  const { store } = createStore(dir, published);
+
+  const created = await store.execute({ type: 'submit', ip: 'a', organization: '北京分行', name: '张三', target: 10 });
+  assert.strictEqual(created.status, 'created');
+
+  // 落盘前不修改内存、不发布
+  const pending = store.execute({ type: 'submit', ip: 'b', organization: '北京分行', name: '李四', target: 20 });
+  assert.strictEqual(store.participants.size, 1);
+  assert.strictEqual(published.length, 1);
+  assert.strictEqual((await pending).status, 'created');
+  assert.strictEqual(published.length, 2);
+
+  // 落盘失败：调用方收到错误，内存、榜单和已发布的变更都没有这次写入
+  const restore = failFsync(3);
+  try {
+    await assert.rejects(store.execute({ type: 'submit', ip: 'c', organization: '北京分行', name: '王五', target: 30 }));
+    await assert.rejects(store.execute({ type: 'confirm', id: created.participant.id, target: 99 }));
+    await assert.rejects(store.execute({ type: 'clear' }));
+  } finally {
+    restore();
+  }
+  assert.strictEqual(published.length, 2);
+  assert.strictEqual(store.participants.size, 2);
+  assert.strictEqual(store.findDuplicatePerson('北京分行', '王五'), null);
+  assert.strictEqual(store.participants.get(created.participant.id).target, 10);
+  assert.deepStrictEqual(store.leaderboard.toArray().map(p => p.name), ['李四', '张三']);
+
+  // 重试不会被判为重复人员，日志中也没有失败批次的残留
+  const retried = await store.execute({ type: 'submit', ip: 'c', organization: '北京分行', name: '王五', target: 30 });
+  assert.strictEqual(retried.status, 'created');
+  crash(store.journal);
+
+  const restarted = createStore(dir, []).store;
+  assert.deepStrictEqual(
+    restarted.leaderboard.toArray().map(p => [p.name, p.target]),
+    store.leaderboard.toArray().map(p => [p.name, p.target])
+  );
+  crash(restarted.journal);
+}
+
+async function testConcurrentDuplicate() {
+  const dir = createTempDir();
+  const { store } = createStore(dir, []);
+
+  const results = await Promise.all([
+    store.execute({ type: 'submit', ip: 'a', organization: '上海分行', name: '赵六', target: 10 }),
+    store.execute({ type: 'submit', ip: 'b', organization: '上海分行', name: '赵六', target: 20 })
+  ]);
+  assert.deepStrictEqual(results.map(result => result.status), ['created', 'duplicate']);
+  assert.strictEqual(results[1].participant.id, results[0].participant.id);
+  assert.strictEqual(store.participants.size, 1);
+  crash(store.journal);
+}
+
+const tests = [
+  ['重放日志恢复数据', testReplay],
+  ['截断不完整的最后一行', testTornLastLine],
+  ['快照压缩', testCompaction],
+  ['落盘失败时不应用写入', testWriteAhead],
+  ['并发提交同一人员', testConcurrentDuplicate]
+];
+
+async function main() {
+  let failed = 0;
+  for (const [name, fn] of tests) {
+    try {
+      await fn();
+      console.log(`✅ ${name}`);
+    } catch (error) {
+      failed++;
+      console.log(`❌ ${name}: ${error.message}`);
+    }
+  }
+
+  tempDirs.forEach(dir => fs.rmSync(dir, { recursive: true, force: true }));
+  process.exit(failed === 0 ? 0 : 1);
+}
+
+main();
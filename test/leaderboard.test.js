@@ -0,0 +1,146 @@
+// 榜单有序索引测试
+// 随机交替执行插入、更新、删除、清空，每一步与 Array.sort 的参考排序逐项比对名次和区间查询，
+// 并检查无效排序键（NaN/Infinity）被拒绝且不破坏索引
+// 用法: node test/leaderboard.test.js [操作次数]
+
+const assert = require('assert');
+const { LeaderboardIndex, compareParticipants } = require('../lib/leaderboard');
+const { createRandom } = require('./helpers');
+
+const OPERATIONS = parseInt(process.argv[2], 10) || 20000;
+
+// 固定种子，保证失败可复现（跳表层数仍使用 Math.random）
+const random = createRandom(20241122);
+const pick = (list) => list[Math.floor(random() * list.length)];
+
+// 金额和时间取值范围较小，制造大量并列，覆盖时间和ID兜底的排序
+function randomKey() {
+  return {
+    target: Math.floor(random() * 50) * 0.5 + 0.01,
+    timestamp: 1700000000000 + Math.floor(random() * 200)
+  };
+}
+
+function assertMatches(index, participants) {
+  const expected = Array.from(participants.values()).sort(compareParticipants);
+  const actual = index.toArray();
+
+  assert.strictEqual(index.size, expected.length);
+  assert.strictEqual(actual.length, expected.length);
+  expected.forEach((participant, rank) => {
+    assert.strictEqual(actual[rank].id, participant.id, `名次 ${rank} 不一致`);
+  });
+  return expected;
+}
+
+function assertQueries(index, expected) {
+  expected.forEach((participant, rank) => {
+    assert.strictEqual(index.rank(participant.id), rank);
+    assert.strictEqual(index.at(rank), participant);
+  });
+  assert.strictEqual(index.at(expected.length), null);
+
+  const start = Math.floor(random() * (expected.length + 1));
+  const end = start + Math.floor(random() * 20);
+  assert.deepStrictEqual(
+    index.slice(start, end).map(participant => participant.id),
+    expected.slice(start, end).map(participant => participant.id)
+  );
+}
+
+function testConsistency() {
+  const index = new LeaderboardIndex();
+  const participants = new Map();
+  let nextId = 1;
+
+  for (let i = 0; i < OPERATIONS; i++) {
+    const roll = random();
+
+    if (roll < 0.5 || participants.size === 0) {
+      const participant = { id: nextId++, ...randomKey() };
+      participants.set(participant.id, participant);
+      const rank = index.insert(participant);
+      const expected = assertMatches(index, participants);
+      assert.strictEqual(expected[rank], participant);
+    } else if (roll < 0.8) {
+      // 覆盖更新：与 ParticipantStore 一样原地修改参与者对象
+      const participant = participants.get(pick(Array.from(participants.keys())));
+      const before = index.rank(participant.id);
+      Object.assign(participant, randomKey());
+      const { from, to } = index.update(participant);
+      assert.strictEqual(from, before);
+      assert.strictEqual(assertMatches(index, participants)[to], participant);
+    } else if (roll < 0.998) {
+      const id = pick(Array.from(participants.keys()));
+      const before = index.rank(id);
+      assert.strictEqual(index.remove(id), before);
+      participants.delete(id);
+      assert.strictEqual(index.has(id), false);
+      assert.strictEqual(index.remove(id), -1);
+      assertMatches(index, participants);
+    } else {
+      index.clear();
+      participants.clear();
+      assertMatches(index, participants);
+    }
+
+    if (i % 50 === 0) {
+      assertQueries(index, assertMatches(index, participants));
+    }
+  }
+
+  assertQueries(index, assertMatches(index, participants));
+}
+
+function testRejectsInvalidKeys() {
+  const index = new LeaderboardIndex();
+  const participants = new Map();
+  for (let id = 1; id <= 30; id++) {
+    const participant = { id: id, ...randomKey() };
+    participants.set(id, participant);
+    index.insert(participant);
+  }
+
+  [NaN, Infinity, -Infinity, undefined, '12'].forEach(value => {
+    assert.throws(() => index.insert({ id: 100, target: value, timestamp: Date.now() }), RangeError);
+    assert.throws(() => index.insert({ id: 100, target: 1, timestamp: value }), RangeError);
+    assert.strictEqual(index.has(100), false);
+
+    // 更新时先校验，原节点不会被摘除
+    const participant = participants.get(7);
+    const saved = participant.target;
+    participant.target = value;
+    assert.throws(() => index.update(participant), RangeError);
+    participant.target = saved;
+    assert.strictEqual(index.has(7), true);
+  });
+
+  // 之后的更新和删除仍能正确定位节点
+  for (let id = 1; id <= 30; id += 3) {
+    Object.assign(participants.get(id), randomKey());
+    index.update(participants.get(id));
+  }
+  for (let id = 2; id <= 30; id += 4) {
+    index.remove(id);
+    participants.delete(id);
+  }
+  assertQueries(index, assertMatches(index, participants));
+}
+
+const tests = [
+  [`随机操作与 Array.sort 一致（${OPERATIONS}次）`, testConsistency],
+  ['拒绝无效排序键', testRejectsInvalidKeys]
+];
+
+let failed = 0;
+tests.forEach(([name, fn]) => {
+  try {
+    fn();
+    console.log(`✅ ${name}`);
+  } catch (error) {
+    failed++;
+    console.log(`❌ ${name}: ${error.message}`);
+  }
+});
+
+process.exit(failed === 0 ? 0 : 1);
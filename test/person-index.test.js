@@ -0,0 +1,225 @@
+// 人员去重压力测试
+// 通过 ParticipantStore 随机交替执行提交、覆盖金额、删除、清空、紧急释放内存和重启恢复（重放持久化日志），
+// 每次提交的判重结果与线性扫描的参考实现比对，并检查查找耗时不随参与人数线性增长
+// 用法: node test/person-index.test.js [操作次数]
+
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { performance } = require('perf_hooks');
+const { PersonIndex, normalizeText, parseNormalizeRules } = require('../lib/person-index');
+const { EventJournal } = require('../lib/journal');
+const { ParticipantStore } = require('../lib/store');
+const { createRandom } = require('./helpers');
+
+const OPERATIONS = parseInt(process.argv[2], 10) || 5000;
+const RULES = parseNormalizeRules('width,space,case'); // 压力测试启用全部规则，覆盖各种写法
+
+const random = createRandom(20240501);
+const pick = (list) => list[Math.floor(random() * list.length)];
+
+const ORGANIZATIONS = ['华夏银行', '北京分行', 'ABC Corp', 'Sales Team', '上海分行'];
+const SURNAMES = ['张', '王', '李', '赵', '刘', 'Li', 'Wang'];
+
+// 生成同一人员的不同写法：全角、空格、大小写
+function variant(text) {
+  let result = text;
+  if (random() < 0.3) {
+    result = result.replace(/[A-Za-z0-9 ]/g, ch => (ch === ' ' ? '　' : String.fromCharCode(ch.charCodeAt(0) + 0xFEE0)));
+  }
+  if (random() < 0.3) {
+    result = result.split('').join(' ');
+  }
+  if (random() < 0.3) {
+    result = random() < 0.5 ? result.toUpperCase() : result.toLowerCase();
+  }
+  return ` ${result} `;
+}
+
+function randomPerson() {
+  return {
+    organization: pick(ORGANIZATIONS),
+    name: `${pick(SURNAMES)}${Math.floor(random() * 20)}`
+  };
+}
+
+function referenceFind(participants, organization, name) {
+  const org = normalizeText(organization, RULES);
+  const person = normalizeText(name, RULES);
+  for (const participant of participants.values()) {
+    if (normalizeText(participant.organization, RULES) === org &&
+        normalizeText(participant.name, RULES) === person) {
+      return participant;
+    }
+  }
+  return null;
+}
+
+function testNormalization() {
+  // 默认不启用规范化：只去除首尾空白后精确匹配
+  const exact = new PersonIndex(parseNormalizeRules());
+  exact.add({ id: 1, organization: 'ABC Corp', name: 'Li Wei' });
+  assert.strictEqual(exact.get(' ABC Corp ', 'Li Wei'), 1);
+  assert.strictEqual(exact.get('abc corp', 'Li Wei'), null);
+  assert.strictEqual(exact.get('ABC Corp', 'LiWei'), null);
+  assert.deepStrictEqual(parseNormalizeRules('none'), []);
+
+  const index = new PersonIndex(RULES);
+  index.add({ id: 1, organization: 'ABC Corp', name: '张三' });
+  assert.strictEqual(index.get('ＡＢＣ　Ｃｏｒｐ', '张三'), 1);
+  assert.strictEqual(index.get('abc corp', ' 张 三 '), 1);
+  assert.strictEqual(index.get('ABC Corp', '张四'), null);
+}
+
+const journalErrors = [];
+
+function createStore(dir) {
+  const store = new ParticipantStore({
+    maxParticipants: Infinity,
+    rateLimitMs: 0,
+    normalizeRules: RULES,
+    journal: new EventJournal({ dir: dir, snapshotEvery: 200, onError: error => journalErrors.push(error) })
+  });
+  store.load();
+  return store;
+}
+
+// 模拟进程崩溃后重启：不写最终快照，新实例从快照和日志恢复
+// 先等旧实例的提交和压缩结束，真实进程崩溃时它们会随进程一起停止，不会与新实例同时写目录
+async function restart(store, dir) {
+  while (store.journal.committing || store.journal.commitScheduled) {
+    await new Promise(resolve => setTimeout(resolve, 1));
+  }
+  fs.closeSync(store.journal.fd);
+  store.journal.closed = true;
+  return createStore(dir);
+}
+
+function assertIndexed(store) {
+  assert.strictEqual(store.personIndex.size, store.participants.size);
+  for (const participant of store.participants.values()) {
+    assert.strictEqual(
+      store.findDuplicatePerson(variant(participant.organization), variant(participant.name)),
+      participant
+    );
+  }
+}
+
+async function testStoreConsistency() {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'meeting-person-test-'));
+  let store = createStore(dir);
+
+  try {
+    for (let i = 0; i < OPERATIONS; i++) {
+      const roll = random();
+      const ids = () => Array.from(store.participants.keys());
+
+      if (roll < 0.6 || store.participants.size === 0) {
+        // 提交：与参考实现一致地判定为新增或重复
+        const source = randomPerson();
+        const organization = variant(source.organization).trim();
+        const name = variant(source.name).trim();
+        const expected = referenceFind(store.participants, organization, name);
+        const result = await store.execute({
+          type: 'submit', ip: `10.0.0.${i}`, organization: organization, name: name, target: 1 + Math.floor(random() * 1000)
+        });
+        if (expected) {
+          assert.strictEqual(result.status, 'duplicate');
+          assert.strictEqual(result.participant, expected);
+        } else {
+          assert.strictEqual(result.status, 'created');
+        }
+      } else if (roll < 0.8) {
+        // 覆盖金额：人员不变，仍能按任意写法查到
+        const participant = store.participants.get(pick(ids()));
+        const result = await store.execute({ type: 'confirm', id: participant.id, target: 1 + Math.floor(random() * 1000) });
+        assert.strictEqual(result.status, 'updated');
+        assert.strictEqual(store.findDuplicatePerson(variant(participant.organization), participant.name), participant);
+      } else if (roll < 0.97) {
+        const participant = store.participants.get(pick(ids()));
+        await store.execute({ type: 'remove', id: participant.id });
+        assert.strictEqual(store.findDuplicatePerson(participant.organization, participant.name), null);
+      } else if (roll < 0.995) {
+        // 重启恢复后数据与判重索引保持一致
+        const before = store.leaderboard.toArray().map(p => [p.id, p.organization, p.name, p.target]);
+        store = await restart(store, dir);
+        assert.deepStrictEqual(store.leaderboard.toArray().map(p => [p.id, p.organization, p.name, p.target]), before);
+        assertIndexed(store);
+      } else if (roll < 0.998) {
+        // 紧急释放内存写入日志：释放后再次提交同一人员只新增一次，重启后不会恢复出重复人员
+        const released = store.leaderboard.toArray()[0];
+        await store.releaseMemory();
+        assert.strictEqual(store.personIndex.size, 0);
+        assert.strictEqual(store.journal.state.participants.size, 0);
+        if (released) {
+          const result = await store.execute({
+            type: 'submit', ip: `10.0.1.${i}`, organization: released.organization, name: released.name, target: released.target + 1
+          });
+          assert.strictEqual(result.status, 'created');
+        }
+        const before = store.leaderboard.toArray().map(p => [p.id, p.organization, p.name, p.target]);
+        store = await restart(store, dir);
+        assert.deepStrictEqual(store.leaderboard.toArray().map(p => [p.id, p.organization, p.name, p.target]), before);
+        assertIndexed(store);
+      } else {
+        await store.execute({ type: 'clear' });
+        assert.strictEqual(store.personIndex.size, 0);
+      }
+
+      assert.strictEqual(store.personIndex.size, store.participants.size);
+    }
+
+    assertIndexed(store);
+    assert.deepStrictEqual(journalErrors, []);
+  } finally {
+    await store.close();
+    fs.rmSync(dir, { recursive: true, force: true });
+  }
+}
+
+function measureLookup(size) {
+  const index = new PersonIndex(RULES);
+  for (let id = 1; id <= size; id++) {
+    index.add({ id: id, organization: `机构${id % 100}`, name: `参与者${id}` });
+  }
+
+  const lookups = 20000;
+  const started = performance.now();
+  for (let i = 0; i < lookups; i++) {
+    const id = 1 + (i * 7919) % size;
+    index.get(`机构${id % 100}`, `参与者${id}`);
+  }
+  return (performance.now() - started) / lookups;
+}
+
+function testScaling() {
+  measureLookup(1000); // 预热
+  const small = measureLookup(1000);
+  const large = measureLookup(100000);
+  console.log(`  查找耗时: 1千人 ${(small * 1000).toFixed(2)}µs，10万人 ${(large * 1000).toFixed(2)}µs`);
+  // 人数增加100倍，线性扫描耗时也会增加约100倍；哈希索引应基本持平
+  assert.ok(large < small * 10, '查找耗时随人数线性增长');
+}
+
+const tests = [
+  ['规范化规则', testNormalization],
+  [`经 ParticipantStore 随机操作判重一致（${OPERATIONS}次）`, testStoreConsistency],
+  ['查找耗时与人数无关', testScaling]
+];
+
+async function main() {
+  let failed = 0;
+  for (const [name, fn] of tests) {
+    try {
+      await fn();
+      console.log(`✅ ${name}`);
+    } catch (error) {
+      failed++;
+      console.log(`❌ ${name}: ${error.message}`);
+    }
+  }
+  process.exit(failed === 0 ? 0 : 1);
+}
+
+main();